@@ -1,12 +1,21 @@
+from __future__ import annotations
+
 import logging
-from datetime import timedelta
+import os
+from typing import TYPE_CHECKING
 
-import geopandas as gpd
-import hvplot
-import hvplot.pandas  # noqa
-import movingpandas as mpd
+import numpy as np
+from app import clustering, distance, incremental, map_html, projection, stops_writer, sweep, window
+from app.profiling import Profiler
+from app.result_cache import ResultCache
+from app.stationarity import stationary_codes, window_spread
+from app.track_store import TrackStore
 from sdk.moveapps_spec import hook_impl
-from shapely.geometry import LineString
+
+if TYPE_CHECKING:
+    # The plotting and geo stacks are slow to import and only loaded once they are needed.
+    import geopandas as gpd
+    import movingpandas as mpd
 
 
 class App(object):
@@ -14,49 +23,185 @@ class App(object):
     def __init__(self, moveapps_io):
         self.moveapps_io = moveapps_io
         self.id_column = 'trackId'
+        self.artifacts = []
 
     @hook_impl
     def execute(self, data: mpd.TrajectoryCollection, config: dict) -> mpd.TrajectoryCollection:
         logging.info('Starting stationarity detection')
-        stops = self.stops_gdf(data, config)
-        if stops.empty:
-            logging.info('No stationary tags found')
+        cache, key = self.result_cache(config)
+        if key is not None and cache.restore(key, self.moveapps_io):
             return data
-        self.plot_map(stops)
+        self.artifacts = []
+        with Profiler.from_environment(self.moveapps_io) as profiler:
+            self.write_artifacts(data, config, profiler)
+        if key is not None:
+            cache.store(key, self.moveapps_io, self.artifacts)
         return data
+
+    def write_artifacts(self, data: mpd.TrajectoryCollection, config: dict, profiler: Profiler) -> None:
+        if sweep.is_sweep(config):
+            with profiler.span('sweep'):
+                self.write_sweep(data, config)
+            return
+        with profiler.span('stops_gdf'):
+            stops = self.end_locations(data, config)
+        with profiler.span('to_csv'):
+            self.write_csv(stops, config, data)
+        logging.info(f'CRS transformer cache: {projection.cache_info()}')
+        if stops.empty:
+            logging.info('No stationary tags found')
+            return
+        if config.get("cluster_radius"):
+            with profiler.span('clusters'):
+                self.write_clusters(data, stops, config)
+        with profiler.span('plot_map'):
+            self.plot_map(stops, config)
+
+    def result_cache(self, config: dict):
+        """
+        :return: the result cache and the key of this run, or `(None, None)` when the run can not be cached
+        """
+        cache = ResultCache.from_environment()
+        source_file = os.environ.get('SOURCE_FILE')
+        if cache is None or not source_file or not os.path.exists(source_file):
+            return None, None
+        if config.get("incremental"):
+            # the results depend on the state of earlier runs, not only on the input
+            logging.info('Result cache is not used for incremental runs')
+            return None, None
+        return cache, cache.key(source_file, config)
+
+    def artifact_file(self, name: str) -> str:
+        if name not in self.artifacts:
+            self.artifacts.append(name)
+        return self.moveapps_io.create_artifacts_file(name)
     
     def stopped(self, data: mpd.Trajectory, config: dict) -> bool:
-        earliest_time = data.get_end_time() - timedelta(hours=config["stop_duration"])
-        try:
-            segment = data.get_segment_between(earliest_time, data.get_end_time())
-        except ValueError:
+        metric = config.get("stationarity_metric", 'bbox')
+        if metric != 'bbox' or config.get("max_window_fixes"):
+            store = TrackStore.from_collection([data])
+            spread = window_spread(
+                store.t, store.x, store.y, store.offsets, config["stop_duration"], data.crs,
+                config.get("distance_method", 'robinson'), metric, config.get("radius_percentile", 90),
+                [config["distance_tolerance"]], config.get("max_window_fixes")
+            )[0]
+            if np.isnan(spread):
+                logging.error(f'Fewer than 2 entries for {data.id}, unable to make stationarity determination')
+                return False
+            return bool(spread <= config["distance_tolerance"])
+
+        count, bb = window.trailing_bounds(
+            data.df.index, data.df.geometry.x.values, data.df.geometry.y.values, config["stop_duration"]
+        )
+        if count < 2:
             logging.error(f'Fewer than 2 entries for {data.id}, unable to make stationarity determination')
             return False
-        
-        bb = segment.get_bbox()
-        extremes = gpd.GeoSeries(LineString(((bb[0], bb[1]), (bb[2], bb[3]))), crs=data.crs)
-        # Need to transform data into a metric projected CRS.
-        extremes = extremes.to_crs("ESRI:54031")
-        if extremes.length[0] <= config["distance_tolerance"]:
+
+        # Need a metric distance: reproject to a metric CRS or measure on the sphere/ellipsoid.
+        method = config.get("distance_method", 'robinson')
+        diagonal = distance.distances(bb[0], bb[1], bb[2], bb[3], data.crs, method)
+        if diagonal[0] <= config["distance_tolerance"]:
             return True
 
         return False
 
     def stops_gdf(self, data: mpd.TrajectoryCollection, config: dict) -> gpd.GeoDataFrame:
-        ids: list[str] = []
-        for traj in data:
-            if self.stopped(traj, config):
-                ids.append(traj.id)
-        stops = data.filter(self.id_column, ids).get_end_locations()
+        stops = self.end_locations(data, config)
+        self.write_csv(stops, config, data)
+        return stops
+
+    def end_locations(self, data: mpd.TrajectoryCollection, config: dict) -> gpd.GeoDataFrame:
+        store = TrackStore.from_collection(data)
+        if config.get("incremental"):
+            ids = incremental.stationary_track_ids(
+                data, config, self.moveapps_io.create_artifacts_file(incremental.STATE_FILE), store
+            )
+        else:
+            ids = [store.ids[code] for code in stationary_codes(store, config)]
+        # Selects like data.filter(self.id_column, ids): the ID column of the first row is matched, not traj.id
+        ids = set(ids)
+        codes = [code for code, track_id in enumerate(store.first_values(self.id_column)) if track_id in ids]
+        stops = store.end_locations(codes)
         if not stops.empty:
             # Temporary while crs is set incorrectly in import. Update to commented out code once fixed.
             # stops.set_crs(data.to_traj_gdf().crs, inplace=True)
             stops.set_crs("epsg:4326", inplace=True)
-        logging.info('Created csv file for stationary tags')
-        stops.to_csv(self.moveapps_io.create_artifacts_file('stationary.csv'))
         return stops
 
-    def plot_map(self, points: gpd.GeoDataFrame) -> None:
+    def stop_times(self, stops: gpd.GeoDataFrame, data: mpd.TrajectoryCollection) -> list:
+        """
+        :return: time of every stop, from its `timestamps` column or else the end time of its trajectory
+        """
+        if 'timestamps' in stops.columns:
+            return list(stops['timestamps'])
+        if stops.empty:
+            return []
+        # Stops are final rows, so they carry the ID column of their trajectory's final row, which need not be traj.id
+        end_times = {traj.df[self.id_column].iloc[-1]: traj.get_end_time() for traj in data}
+        return [end_times.get(track_id) for track_id in stops[self.id_column]]
+
+    def write_csv(self, stops: gpd.GeoDataFrame, config: dict = None,
+                  data: mpd.TrajectoryCollection = None) -> None:
+        config = config or {}
+        columns = stops_writer.parse_columns(config.get("csv_columns"))
+        end_times = None
+        if data is not None and 'timestamp' in columns and 'timestamps' not in stops.columns:
+            end_times = self.stop_times(stops, data)
+        arrays = stops_writer.stop_columns(stops, columns, end_times)
+        rows = stops_writer.write_csv(arrays, self.artifact_file('stationary.csv'))
+        if rows:
+            logging.info(f'Created csv file for {rows} stationary tags')
+        else:
+            logging.info('No stationary tags, created csv file with header only')
+
+        export = config.get("csv_export", 'none')
+        if export not in stops_writer.EXPORTS:
+            return
+        path = self.artifact_file(f'stationary{stops_writer.EXPORTS[export]}')
+        try:
+            if export == 'parquet':
+                stops_writer.write_parquet(arrays, path)
+            else:
+                stops_writer.write_csv(arrays, path, export)
+        except ImportError as error:
+            self.artifacts.remove(os.path.basename(path))
+            logging.warning(f'Skipped {export} export of the stationary tags, {error.name} is not installed')
+            return
+        logging.info(f'Created {export} export of the stationary tags')
+
+    def write_sweep(self, data: mpd.TrajectoryCollection, config: dict) -> None:
+        matrix = sweep.sweep(data, config)
+        matrix.to_csv(self.artifact_file(sweep.SWEEP_FILE), index=False)
+        logging.info(f'Created sweep of {len(matrix)} stop duration and distance tolerance pairs')
+
+    def write_clusters(self, data: mpd.TrajectoryCollection, stops: gpd.GeoDataFrame, config: dict) -> None:
+        clusters = clustering.cluster_summary(
+            stops.geometry.x.values, stops.geometry.y.values, stops[self.id_column].values,
+            self.stop_times(stops, data), config["cluster_radius"]
+        )
+        clusters.to_csv(self.artifact_file('stationary_clusters.csv'), index=False)
+        logging.info(f'Created cluster summary with {len(clusters)} clusters of stationary tags')
+
+    def plot_map(self, points: gpd.GeoDataFrame, config: dict = None) -> None:
+        path = self.artifact_file('stationary.html')
+        renderer = (config or {}).get("map_renderer", 'hvplot')
+        if renderer == 'leaflet':
+            map_html.save(points, path)
+            logging.info('Created html map for stationary tags')
+            return
+        if renderer == 'offline':
+            map_html.save_offline(points, path, self.moveapps_io.get_app_file_path('basemap'))
+            logging.info('Created offline html map for stationary tags')
+            return
+
+        import hvplot
+        import hvplot.pandas  # noqa
+
+        limits = {}
+        if len(points) == 1:
+            # holoviz can't automatically calculate smart limits when there is only one point to plot - add them manually
+            x, y = points.geometry.x.iloc[0], points.geometry.y.iloc[0]
+            limits = {'xlim': (x - 1, x + 1), 'ylim': (y - 1, y + 1)}
         map = points.hvplot(
             title='Stationary Tags',
             xlabel='Longitude', ylabel='Latitude',
@@ -64,23 +209,9 @@ class App(object):
             size=200,
             width=1280, height=600,
             geo=True, tiles='OSM',
-            color='red'
+            color='red',
+            **limits
         )
-        if len(points) == 1:
-            # holoviz can't automatically calculate smart limits when there is only one point to plot - add them manually
-            bounds = points.total_bounds
-            map = points.hvplot(
-                title='Stationary Tags',
-                xlim=(bounds[0] - 1, bounds[2] + 1),
-                ylim=(bounds[1] - 1, bounds[3] + 1),
-                xlabel='Longitude', ylabel='Latitude',
-                hover_cols=['Longitude', 'Latitude', 'timestamps', 'trackId'],
-                size=200,
-                width=1280, height=600,
-                geo=True, tiles='OSM',
-                color='red'
-            )
-        render = map
-        hvplot.save(render, self.moveapps_io.create_artifacts_file('stationary.html'))
+        hvplot.save(map, path)
         logging.info('Created html map for stationary tags')
-        return
\ No newline at end of file
+        return
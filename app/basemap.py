@@ -0,0 +1,155 @@
+"""
+Offline basemaps for the stationary tags map: raster tiles from an MBTiles file or a `{z}/{x}/{y}` tile
+directory, or simplified land polygons from a GeoJSON file. Everything is read from the `basemap` app-files.
+"""
+import base64
+import glob
+import json
+import logging
+import math
+import os
+import sqlite3
+
+import numpy as np
+
+TILE_SIZE = 256
+MAX_LATITUDE = 85.0511287798
+# upper bound of the tiles embedded into one page, keeps its size predictable
+MAX_TILES = 64
+MIME_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'jpeg': 'image/jpeg', 'webp': 'image/webp'}
+
+
+def mercator(lon, lat) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Projects longitude/latitude to Web Mercator world coordinates: the world is a square of `TILE_SIZE` units
+    with the origin at its north-west corner, so zoom level z tiles are `TILE_SIZE / 2 ** z` units wide.
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+    x = (lon + 180) / 360 * TILE_SIZE
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * TILE_SIZE
+    return x, y
+
+
+class MBTiles:
+    """
+    Raster tiles of an MBTiles (SQLite) file. Tile rows are stored in TMS order, flipped to XYZ on access.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with sqlite3.connect(f'file:{path}?mode=ro', uri=True) as connection:
+            metadata = dict(connection.execute('SELECT name, value FROM metadata').fetchall())
+            zooms = connection.execute('SELECT DISTINCT zoom_level FROM tiles').fetchall()
+        self.format = metadata.get('format', 'png')
+        self.attribution = metadata.get('attribution') or os.path.basename(path)
+        self.zooms = sorted(zoom for (zoom,) in zooms)
+
+    def tiles(self, zoom: int, xs: range, ys: range) -> dict:
+        """
+        :return: tile content by (x, y) for the tiles of the ranges that exist
+        """
+        rows = [2 ** zoom - 1 - y for y in ys]
+        with sqlite3.connect(f'file:{self.path}?mode=ro', uri=True) as connection:
+            found = connection.execute(
+                'SELECT tile_column, tile_row, tile_data FROM tiles WHERE zoom_level = ? '
+                'AND tile_column BETWEEN ? AND ? AND tile_row BETWEEN ? AND ?',
+                (zoom, xs.start, xs.stop - 1, min(rows), max(rows))
+            ).fetchall()
+        return {(x, 2 ** zoom - 1 - row): data for x, row, data in found}
+
+
+class TileDirectory:
+    """
+    Raster tiles stored as `{z}/{x}/{y}.{format}` files.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.attribution = os.path.basename(os.path.normpath(root))
+        self.zooms = sorted(int(name) for name in os.listdir(root) if name.isdigit())
+        sample = next(iter(glob.glob(os.path.join(root, '*', '*', '*.*'))), '')
+        self.format = os.path.splitext(sample)[1].lstrip('.') or 'png'
+
+    def tiles(self, zoom: int, xs: range, ys: range) -> dict:
+        found = {}
+        for x in xs:
+            for y in ys:
+                path = os.path.join(self.root, str(zoom), str(x), f'{y}.{self.format}')
+                if os.path.exists(path):
+                    with open(path, 'rb') as file:
+                        found[(x, y)] = file.read()
+        return found
+
+
+def tile_source(directory: str):
+    """
+    Finds raster tiles in an app-files directory: the first `*.mbtiles` file, or a directory (the app-files
+    directory itself or one level below) named by zoom levels.
+
+    :return: `MBTiles`, `TileDirectory` or None
+    """
+    if not directory:
+        return None
+    mbtiles = sorted(glob.glob(os.path.join(directory, '**', '*.mbtiles'), recursive=True))
+    if mbtiles:
+        source = MBTiles(mbtiles[0])
+        if source.format in MIME_TYPES and source.zooms:
+            return source
+        logging.warning(f'Ignoring {mbtiles[0]}: only raster MBTiles (png/jpg/webp) are supported')
+    for root in [directory] + sorted(glob.glob(os.path.join(directory, '*', ''))):
+        if os.path.isdir(root) and any(name.isdigit() for name in os.listdir(root)):
+            source = TileDirectory(root)
+            if source.format in MIME_TYPES:
+                return source
+    return None
+
+
+def tile_layer(source, bounds: tuple, width: int) -> list:
+    """
+    Selects the tiles covering `bounds` at the most detailed available zoom level that roughly matches a map of
+    `width` pixels and needs no more than `MAX_TILES` tiles.
+
+    :param source: `MBTiles` or `TileDirectory`
+    :param bounds: minx, miny, maxx, maxy in world coordinates (see `mercator`)
+    :param width: width of the map in pixels
+    :return: (x, y, size, data URI) per tile in world coordinates
+    """
+    minx, miny, maxx, maxy = bounds
+    span = max(maxx - minx, maxy - miny, 1e-9)
+    # at zoom level z one world unit is 2 ** z pixels
+    wanted = math.ceil(math.log2(max(width / span, 1)))
+    for zoom in sorted((zoom for zoom in source.zooms if zoom <= wanted), reverse=True) or source.zooms[:1]:
+        size = TILE_SIZE / 2 ** zoom
+        last = 2 ** zoom - 1
+        xs = range(max(0, int(minx // size)), min(last, int(maxx // size)) + 1)
+        ys = range(max(0, int(miny // size)), min(last, int(maxy // size)) + 1)
+        if len(xs) * len(ys) > MAX_TILES:
+            continue
+        mime = MIME_TYPES[source.format]
+        return [(x * size, y * size, size, f'data:{mime};base64,{base64.b64encode(data).decode()}')
+                for (x, y), data in sorted(source.tiles(zoom, xs, ys).items())]
+    return []
+
+
+def land_paths(directory: str, precision: int = 2) -> list:
+    """
+    Converts the polygons of the GeoJSON files in an app-files directory to SVG path data in world coordinates.
+    """
+    if not directory:
+        return []
+    paths = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.geojson'))):
+        with open(path) as file:
+            collection = json.load(file)
+        for feature in collection.get('features', []):
+            geometry = feature['geometry']
+            polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+            for polygon in polygons:
+                rings = []
+                for ring in polygon:
+                    x, y = mercator(*np.asarray(ring, dtype=np.float64).T)
+                    points = ' '.join(f'{px:.{precision}f} {py:.{precision}f}' for px, py in zip(x, y))
+                    rings.append(f'M{points}Z')
+                paths.append(''.join(rings))
+    return paths
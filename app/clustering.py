@@ -0,0 +1,108 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from app.distance import EARTH_RADIUS
+
+
+def unit_vectors(lon, lat) -> np.ndarray:
+    lon, lat = np.radians(np.asarray(lon, dtype=np.float64)), np.radians(np.asarray(lat, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def union_find(n: int, pairs_i: np.ndarray, pairs_j: np.ndarray) -> np.ndarray:
+    """
+    Connected components of an undirected graph, vectorized with pointer jumping.
+
+    :return: component label per node, the smallest node index of its component
+    """
+    parent = np.arange(n)
+    pairs_i, pairs_j = np.asarray(pairs_i, dtype=np.int64), np.asarray(pairs_j, dtype=np.int64)
+    while True:
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        root_i, root_j = parent[pairs_i], parent[pairs_j]
+        differ = root_i != root_j
+        if not differ.any():
+            return parent
+        root_i, root_j = root_i[differ], root_j[differ]
+        np.minimum.at(parent, np.maximum(root_i, root_j), np.minimum(root_i, root_j))
+
+
+def cluster_labels(lon, lat, radius: float) -> np.ndarray:
+    """
+    Single-linkage clusters of points: two points share a cluster when a chain of points, each within
+    `radius` metres (great-circle) of the next, connects them.
+
+    Points are hashed into a grid over their position on the unit sphere with a cell size of half the radius,
+    so every cell is connected internally and only the neighbouring cells within two steps have to be joined.
+    This needs a handful of hash joins, roughly O(n log n), rather than all pairwise distances.
+
+    :param lon: longitudes in degrees
+    :param lat: latitudes in degrees
+    :param radius: linkage distance in metres
+    :return: cluster label per point, numbered 0..k-1 in order of first appearance
+    """
+    n = len(lon)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    xyz = unit_vectors(lon, lat)
+    chord = 2 * np.sin(min(radius / EARTH_RADIUS, np.pi) / 2)
+    cell = chord / 2
+    cells = pd.DataFrame(np.floor(xyz / cell).astype(np.int64), columns=['cx', 'cy', 'cz'])
+    cells['point'] = np.arange(n)
+
+    # all points of a cell are within the radius of each other: chain them
+    ordered = cells.sort_values(['cx', 'cy', 'cz'], kind='stable')
+    keys = ordered[['cx', 'cy', 'cz']].values
+    same = np.all(keys[1:] == keys[:-1], axis=1)
+    points = ordered['point'].values
+    pairs_i, pairs_j = [points[:-1][same]], [points[1:][same]]
+
+    # between cells, check the candidate pairs of every neighbouring cell (each offset once, by symmetry)
+    offsets = [offset for offset in itertools.product(range(-2, 3), repeat=3) if offset > (0, 0, 0)]
+    for dx, dy, dz in offsets:
+        shifted = cells.assign(cx=cells['cx'] + dx, cy=cells['cy'] + dy, cz=cells['cz'] + dz)
+        candidates = shifted.merge(cells, on=['cx', 'cy', 'cz'], suffixes=('_i', '_j'))
+        i, j = candidates['point_i'].values, candidates['point_j'].values
+        close = np.sum((xyz[i] - xyz[j]) ** 2, axis=1) <= chord ** 2
+        pairs_i.append(i[close])
+        pairs_j.append(j[close])
+
+    roots = union_find(n, np.concatenate(pairs_i), np.concatenate(pairs_j))
+    _, labels = np.unique(roots, return_inverse=True)
+    # renumber by first appearance
+    _, first = np.unique(labels, return_index=True)
+    order = np.argsort(np.argsort(first))
+    return order[labels]
+
+
+def cluster_summary(lon, lat, track_ids, stop_times, radius: float) -> pd.DataFrame:
+    """
+    Groups stationary tags into clusters and summarises every cluster.
+
+    :param lon: longitude of each stop in degrees
+    :param lat: latitude of each stop in degrees
+    :param track_ids: track ID of each stop
+    :param stop_times: time of each stop (last fix of the track)
+    :param radius: linkage distance in metres
+    :return: one row per cluster with `cluster`, `size`, centroid `lon`/`lat`, `trackIds` (`;` separated),
+        `first_stop` and `last_stop`
+    """
+    labels = cluster_labels(lon, lat, radius)
+    xyz = unit_vectors(lon, lat)
+    stops = pd.DataFrame({
+        'cluster': labels, 'x': xyz[:, 0], 'y': xyz[:, 1], 'z': xyz[:, 2],
+        'trackId': [str(track_id) for track_id in track_ids],
+        'time': pd.to_datetime(pd.Series(stop_times)).values,
+    })
+    grouped = stops.groupby('cluster', sort=True)
+    summary = grouped.agg(size=('trackId', 'size'), x=('x', 'mean'), y=('y', 'mean'), z=('z', 'mean'),
+                          first_stop=('time', 'min'), last_stop=('time', 'max'))
+    summary['lon'] = np.degrees(np.arctan2(summary['y'], summary['x']))
+    summary['lat'] = np.degrees(np.arctan2(summary['z'], np.hypot(summary['x'], summary['y'])))
+    summary['trackIds'] = grouped['trackId'].agg(';'.join)
+    return summary.reset_index()[['cluster', 'size', 'lon', 'lat', 'trackIds', 'first_stop', 'last_stop']]
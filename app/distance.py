@@ -0,0 +1,97 @@
+from functools import lru_cache
+
+import numpy as np
+from app import projection
+
+METRIC_CRS = "ESRI:54031"
+GEOGRAPHIC_CRS = "EPSG:4326"
+EARTH_RADIUS = 6371008.8
+
+
+def robinson(x1, y1, x2, y2, crs) -> np.ndarray:
+    """
+    Euclidean distance after reprojecting both points to World Robinson (ESRI:54031).
+    """
+    xs, ys = projection.transform(np.concatenate([x1, x2]), np.concatenate([y1, y2]), crs, METRIC_CRS)
+    n = len(x1)
+    with np.errstate(invalid='ignore'):
+        return np.hypot(xs[n:] - xs[:n], ys[n:] - ys[:n])
+
+
+def haversine(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """
+    Great-circle distance in metres on a sphere with the mean Earth radius.
+    """
+    lon1, lat1, lon2, lat2 = (np.radians(np.asarray(value, dtype=np.float64)) for value in (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def geodesic(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """
+    Distance in metres along the WGS84 ellipsoid.
+    """
+    values = [np.asarray(value, dtype=np.float64) for value in (lon1, lat1, lon2, lat2)]
+    if all(value.size == 1 for value in values):
+        # a single pair goes through pyproj's scalar path, see `app.projection.TransformerCache.transform`
+        _, _, dist = _wgs84().inv(*(value.item() for value in values))
+        return np.full(values[0].shape, dist)
+    _, _, dist = _wgs84().inv(*values)
+    return np.asarray(dist)
+
+
+@lru_cache(maxsize=None)
+def _wgs84():
+    from pyproj import Geod
+
+    return Geod(ellps='WGS84')
+
+
+_geographic: dict = {}
+
+
+def _is_geographic(crs) -> bool:
+    key = str(crs)
+    if key not in _geographic:
+        from pyproj import CRS
+
+        _geographic[key] = CRS.from_user_input(crs).is_geographic
+    return _geographic[key]
+
+
+def lonlat(xs, ys, crs) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Provides coordinates as longitude/latitude, only reprojecting when the CRS is not geographic already.
+    """
+    if _is_geographic(crs):
+        return np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+    return projection.transform(xs, ys, crs, GEOGRAPHIC_CRS)
+
+
+DISTANCE_METHODS = {
+    'robinson': robinson,
+    'haversine': haversine,
+    'geodesic': geodesic,
+}
+
+
+def distances(x1, y1, x2, y2, crs, method: str = 'robinson') -> np.ndarray:
+    """
+    Pairwise distances in metres between two arrays of points.
+
+    :param x1: x coordinates of the first points
+    :param y1: y coordinates of the first points
+    :param x2: x coordinates of the second points
+    :param y2: y coordinates of the second points
+    :param crs: CRS of all coordinates
+    :param method: `robinson` (reprojection to ESRI:54031), `haversine` or `geodesic`
+    :return: distance per pair of points
+    """
+    if method not in DISTANCE_METHODS:
+        raise ValueError(f'Unknown distance method \'{method}\', expected one of {list(DISTANCE_METHODS)}')
+    x1, y1, x2, y2 = (np.atleast_1d(np.asarray(value, dtype=np.float64)) for value in (x1, y1, x2, y2))
+    if method == 'robinson':
+        return robinson(x1, y1, x2, y2, crs)
+    lon1, lat1 = lonlat(x1, y1, crs)
+    lon2, lat2 = lonlat(x2, y2, crs)
+    return DISTANCE_METHODS[method](lon1, lat1, lon2, lat2)
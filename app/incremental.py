@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import logging
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from app import window
+from app.stationarity import stationary_track_ids as detect
+from app.track_store import TrackStore
+
+if TYPE_CHECKING:
+    import movingpandas as mpd
+
+STATE_FILE = 'stationarity_state.pickle'
+STATE_VERSION = 1
+
+
+def load_state(path: str, config: dict) -> dict:
+    """
+    Loads the buffered trailing windows of the previous run.
+
+    :param path: location of the state file
+    :param config: app configuration of this run
+    :return: per track ID a tuple of (CRS key, timestamps, x, y); empty if there is no usable state
+    """
+    if not os.path.exists(path):
+        logging.info('No stationarity state found, processing full history')
+        return {}
+    state = pd.read_pickle(path)
+    if state.get('version') != STATE_VERSION or state.get('stop_duration') != config["stop_duration"]:
+        logging.info('Stationarity state was written with different settings, processing full history')
+        return {}
+    return state['tracks']
+
+
+def incremental_store(store: TrackStore, state: dict) -> TrackStore:
+    """
+    Builds the fixes to check from the buffered windows plus the fixes newer than each track's watermark.
+
+    Tracks without a buffered window, or whose CRS changed, are taken in full.
+
+    :param store: fixes of this run
+    :param state: buffered windows as returned by `load_state`
+    :return: store of the fixes to check, with the tracks of `store`
+    """
+    parts, lengths = [], []
+    new_fixes = 0
+    for track_id, crs, begin, end in zip(store.ids, store.crs, store.offsets[:-1], store.offsets[1:]):
+        length = 0
+        buffered = state.get(track_id)
+        if buffered is not None and buffered[0] == str(crs) and len(buffered[1]):
+            t = window.timestamps_ns(buffered[1])
+            begin += store.t[begin:end].searchsorted(t[-1], side='right')
+            parts.append((t, buffered[2], buffered[3]))
+            length += len(t)
+        new_fixes += end - begin
+        parts.append((store.t[begin:end], store.x[begin:end], store.y[begin:end]))
+        lengths.append(length + end - begin)
+    logging.info(f'Incremental stationarity detection: {new_fixes} new fixes')
+    t, x, y = (np.concatenate([part[column] for part in parts]) for column in range(3))
+    offsets = np.r_[0, np.cumsum(lengths)].astype(np.int64)
+    return TrackStore(store.ids, store.crs, t, x, y, offsets, store.source, store.first, store.last,
+                      store.time_column)
+
+
+def save_state(path: str, checked: TrackStore, config: dict) -> None:
+    """
+    Stores each track's trailing window, which is all a later run needs to continue from.
+    """
+    starts, stops = window.trailing_windows(checked.t, checked.offsets, config["stop_duration"])
+    tracks = {}
+    for track_id, crs, start, stop in zip(checked.ids, checked.crs, starts, stops):
+        tracks[track_id] = (str(crs), checked.t[start:stop].view('datetime64[ns]'), checked.x[start:stop],
+                            checked.y[start:stop])
+    pd.to_pickle({'version': STATE_VERSION, 'stop_duration': config["stop_duration"], 'tracks': tracks}, path)
+
+
+def stationary_track_ids(data: mpd.TrajectoryCollection, config: dict, state_path: str,
+                         store: TrackStore = None) -> list:
+    """
+    Incremental variant of `app.stationarity.stationary_track_ids`.
+
+    Only the fixes newer than the watermark stored in `state_path` are checked for each trajectory; the result is
+    the same as a full run as long as earlier fixes are not altered between runs.
+
+    :param data: the collection to check
+    :param config: app configuration
+    :param state_path: location of the state file, read if present and rewritten afterwards
+    :param store: the fixes of `data`, if already read
+    :return: IDs of the stationary trajectories in collection order
+    """
+    if store is None:
+        store = TrackStore.from_collection(data)
+    if not len(store):
+        return []
+    checked = incremental_store(store, load_state(state_path, config))
+    ids = detect(data, config, store=checked)
+    save_state(state_path, checked, config)
+    return ids
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+from string import Template
+from typing import TYPE_CHECKING
+
+import numpy as np
+from app import basemap
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+
+HOVER_COLUMNS = ['trackId', 'timestamps']
+
+PAGE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>
+body { font-family: sans-serif; margin: 0; }
+h1 { font-size: 1.2em; margin: 8px; }
+#map { width: ${width}px; height: ${height}px; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<div id="map"></div>
+<script>
+var points = $geojson;
+var map = L.map('map');
+L.tileLayer('https://tile.openstreetmap.org/{z}/{x}/{y}.png', {
+  maxZoom: 19,
+  attribution: '&copy; OpenStreetMap contributors'
+}).addTo(map);
+L.geoJSON(points, {
+  pointToLayer: function (feature, latlng) {
+    return L.circleMarker(latlng, {radius: 8, color: 'red', fillColor: 'red', fillOpacity: 0.8});
+  },
+  onEachFeature: function (feature, layer) {
+    var rows = Object.keys(feature.properties).map(function (key) {
+      return '<b>' + key + '</b>: ' + feature.properties[key];
+    });
+    layer.bindTooltip(rows.join('<br>'));
+  }
+}).addTo(map);
+map.fitBounds([[$miny, $minx], [$maxy, $maxx]]);
+</script>
+</body>
+</html>
+""")
+
+# Self-contained page without any external resources: the basemap is embedded into an SVG in Web Mercator world
+# coordinates (see `app.basemap.mercator`), panning and zooming moves the viewBox.
+OFFLINE_PAGE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>
+body { font-family: sans-serif; margin: 0; }
+h1 { font-size: 1.2em; margin: 8px; }
+svg { background: #aad3df; cursor: grab; display: block; }
+.land { fill: #f2efe9; stroke: #b9b4a8; vector-effect: non-scaling-stroke; }
+.stop { fill: red; fill-opacity: 0.8; stroke: darkred; vector-effect: non-scaling-stroke; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<svg id="map" width="$width" height="$height" viewBox="$viewbox" xmlns="http://www.w3.org/2000/svg">
+<g>$tiles</g>
+<g>$land</g>
+<g>$stops</g>
+</svg>
+<p style="margin: 8px; font-size: 0.8em;">$attribution</p>
+<script>
+var svg = document.getElementById('map');
+var box = svg.viewBox.baseVal;
+var width = $width;
+function markers() {
+  var radius = 8 * box.width / width;
+  svg.querySelectorAll('.stop').forEach(function (stop) { stop.setAttribute('r', radius); });
+}
+svg.addEventListener('wheel', function (event) {
+  event.preventDefault();
+  var factor = event.deltaY > 0 ? 1.25 : 0.8;
+  var x = box.x + box.width * event.offsetX / svg.clientWidth;
+  var y = box.y + box.height * event.offsetY / svg.clientHeight;
+  box.x = x - (x - box.x) * factor;
+  box.y = y - (y - box.y) * factor;
+  box.width *= factor;
+  box.height *= factor;
+  markers();
+});
+var drag = null;
+svg.addEventListener('mousedown', function (event) { drag = [event.clientX, event.clientY]; });
+window.addEventListener('mouseup', function () { drag = null; });
+window.addEventListener('mousemove', function (event) {
+  if (!drag) return;
+  box.x -= (event.clientX - drag[0]) * box.width / svg.clientWidth;
+  box.y -= (event.clientY - drag[1]) * box.height / svg.clientHeight;
+  drag = [event.clientX, event.clientY];
+});
+markers();
+</script>
+</body>
+</html>
+""")
+
+
+def to_geojson(points: gpd.GeoDataFrame, columns: list = None, precision: int = 6) -> str:
+    """
+    Serializes points as a compact GeoJSON FeatureCollection.
+
+    :param points: point geometries in longitude/latitude
+    :param columns: columns to include as feature properties, missing ones are skipped
+    :param precision: number of decimals kept for the coordinates
+    :return: GeoJSON without whitespace
+    """
+    columns = [column for column in (columns or HOVER_COLUMNS) if column in points.columns]
+    xs = np.round(points.geometry.x.values, precision)
+    ys = np.round(points.geometry.y.values, precision)
+    properties = points[columns].astype(str).to_dict('records')
+    features = [
+        {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [x, y]},
+         'properties': dict(props, Longitude=x, Latitude=y)}
+        for x, y, props in zip(xs.tolist(), ys.tolist(), properties)
+    ]
+    return json.dumps({'type': 'FeatureCollection', 'features': features}, separators=(',', ':'))
+
+
+def save(points: gpd.GeoDataFrame, path: str, title: str = 'Stationary Tags', width: int = 1280,
+         height: int = 600) -> None:
+    """
+    Writes a standalone Leaflet map of the points without going through holoviews/bokeh.
+
+    A single point is shown with a margin of one degree around it, like the hvplot map.
+    """
+    minx, miny, maxx, maxy = points.total_bounds
+    if len(points) == 1:
+        minx, miny, maxx, maxy = minx - 1, miny - 1, maxx + 1, maxy + 1
+    html = PAGE.substitute(
+        title=title, width=width, height=height,
+        geojson=to_geojson(points).replace('</', '<\\/'),
+        minx=minx, miny=miny, maxx=maxx, maxy=maxy
+    )
+    with open(path, 'w') as file:
+        file.write(html)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+def save_offline(points: gpd.GeoDataFrame, path: str, basemap_dir: str = None, title: str = 'Stationary Tags',
+                 width: int = 1280, height: int = 600) -> None:
+    """
+    Writes a standalone map of the points that needs no network access to be produced or opened.
+
+    The basemap comes from `basemap_dir`: raster tiles of an MBTiles file or tile directory covering the points
+    are embedded as images (see `app.basemap.tile_layer`), otherwise the land polygons of its GeoJSON files. A
+    single point is shown with a margin of one degree around it, like the other maps.
+    """
+    minx, miny, maxx, maxy = points.total_bounds
+    if len(points) == 1:
+        minx, miny, maxx, maxy = minx - 1, miny - 1, maxx + 1, maxy + 1
+    (left, right), (bottom, top) = basemap.mercator([minx, maxx], [miny, maxy])
+    # 5% margin and the aspect ratio of the page
+    span_x, span_y = max(right - left, 1e-6) * 1.1, max(bottom - top, 1e-6) * 1.1
+    span_x, span_y = max(span_x, span_y * width / height), max(span_y, span_x * height / width)
+    center_x, center_y = (left + right) / 2, (top + bottom) / 2
+    bounds = (center_x - span_x / 2, center_y - span_y / 2, center_x + span_x / 2, center_y + span_y / 2)
+
+    tiles, land, attribution = [], [], ''
+    source = basemap.tile_source(basemap_dir)
+    if source is not None:
+        tiles = basemap.tile_layer(source, bounds, width)
+        attribution = f'Basemap: {_escape(source.attribution)}'
+    if not tiles:
+        land = basemap.land_paths(basemap_dir)
+        attribution = 'Basemap: Natural Earth' if land else ''
+
+    xs, ys = basemap.mercator(points.geometry.x.values, points.geometry.y.values)
+    columns = [column for column in HOVER_COLUMNS if column in points.columns]
+    labels = points[columns].astype(str).to_dict('records')
+    stops = ''.join(
+        f'<circle class="stop" cx="{x:.6f}" cy="{y:.6f}" r="0"><title>'
+        + _escape('\n'.join([f'{key}: {value}' for key, value in label.items()]
+                            + [f'Longitude: {lon:.6f}', f'Latitude: {lat:.6f}']))
+        + '</title></circle>'
+        for x, y, lon, lat, label in zip(xs, ys, points.geometry.x.values, points.geometry.y.values, labels)
+    )
+    html = OFFLINE_PAGE.substitute(
+        title=title, width=width, height=height, viewbox=' '.join(f'{value:.6f}' for value in
+                                                                  (bounds[0], bounds[1], span_x, span_y)),
+        tiles=''.join(f'<image x="{x}" y="{y}" width="{size}" height="{size}" href="{uri}"/>'
+                      for x, y, size, uri in tiles),
+        land=''.join(f'<path class="land" d="{path}"/>' for path in land),
+        stops=stops, attribution=attribution
+    )
+    with open(path, 'w') as file:
+        file.write(html)
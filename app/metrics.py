@@ -0,0 +1,223 @@
+"""
+Stationarity metrics measuring the spread of the fixes in the trailing window of every track.
+
+All metrics work on fixes ordered by track and time and on the `starts`/`stops` window indices of
+`app.window.trailing_windows`, and are computed for all tracks at once.
+"""
+import numpy as np
+from app import distance
+from app.distance import EARTH_RADIUS
+
+METRICS = ('bbox', 'final_radius', 'percentile_radius', 'enclosing_circle')
+# Bădoiu-Clarkson iterations; the approximate enclosing circle radius is at most 1 + 1/sqrt(n) times too large
+CIRCLE_ITERATIONS = 64
+# metrics that can only grow when fixes are added to a window, so a part of the window bounds them from below
+MONOTONE_METRICS = ('final_radius', 'enclosing_circle')
+# fixes of the first backward scan step, every further step covers four times as many
+SCAN_BLOCK = 256
+
+
+def window_fixes(starts: np.ndarray, stops: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :return: index of every fix inside a window, ordered by window, and the offsets of the windows in it
+    """
+    lengths = stops - starts
+    offsets = np.r_[0, np.cumsum(lengths)]
+    index = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, lengths)
+    return index, offsets
+
+
+def final_distances(x: np.ndarray, y: np.ndarray, starts: np.ndarray, stops: np.ndarray, crs,
+                    method: str = 'robinson') -> tuple[np.ndarray, np.ndarray]:
+    """
+    :return: distance in metres of every window fix to the final fix of its track and the window offsets
+    """
+    index, offsets = window_fixes(starts, stops)
+    final = np.repeat(stops - 1, stops - starts)
+    return distance.distances(x[index], y[index], x[final], y[final], crs, method), offsets
+
+
+def final_radius(x, y, starts, stops, crs, method: str = 'robinson') -> np.ndarray:
+    """
+    :return: per track the largest distance in metres of a window fix from the final fix
+    """
+    dist, offsets = final_distances(x, y, starts, stops, crs, method)
+    return np.maximum.reduceat(dist, offsets[:-1]) if len(dist) else np.zeros(0)
+
+
+def percentile_radius(x, y, starts, stops, crs, method: str = 'robinson', percentile: float = 90) -> np.ndarray:
+    """
+    Like `final_radius` but ignores the fixes farthest from the final fix: the `percentile` of the distances
+    of the window fixes to the final fix, interpolated linearly like `numpy.percentile`.
+    """
+    dist, offsets = final_distances(x, y, starts, stops, crs, method)
+    if not len(dist):
+        return np.zeros(0)
+    lengths = np.diff(offsets)
+    group = np.repeat(np.arange(len(lengths)), lengths)
+    ordered = dist[np.lexsort((dist, group))]
+    position = (lengths - 1) * percentile / 100
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    low, high = ordered[offsets[:-1] + lower], ordered[offsets[:-1] + upper]
+    return low + (high - low) * (position - lower)
+
+
+def local_plane(x, y, starts, stops, crs) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Projects the window fixes onto a plane in metres centred on the final fix of their track (equirectangular,
+    accurate while a window spans no more than a few tens of kilometres).
+
+    :return: east and north offsets of every window fix and the window offsets
+    """
+    index, offsets = window_fixes(starts, stops)
+    final = np.repeat(stops - 1, stops - starts)
+    lon, lat = distance.lonlat(x[index], y[index], crs)
+    lon0, lat0 = distance.lonlat(x[final], y[final], crs)
+    dlon = (lon - lon0 + 180) % 360 - 180
+    east = EARTH_RADIUS * np.cos(np.radians(lat0)) * np.radians(dlon)
+    north = EARTH_RADIUS * np.radians(lat - lat0)
+    return east, north, offsets
+
+
+def approximate_circles(east: np.ndarray, north: np.ndarray, offsets: np.ndarray,
+                        iterations: int = CIRCLE_ITERATIONS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Bădoiu-Clarkson approximation of the minimum enclosing circle of every window: the centre repeatedly moves
+    towards the farthest fix by a shrinking step. All windows are advanced together.
+
+    :return: lower and upper bound of the enclosing circle radius per window
+    """
+    lengths = np.diff(offsets)
+    group = np.repeat(np.arange(len(lengths)), lengths)
+    positions = np.arange(len(east))
+    cx, cy = east[offsets[:-1]].copy(), north[offsets[:-1]].copy()
+    for step in range(1, iterations + 1):
+        squared = (east - cx[group]) ** 2 + (north - cy[group]) ** 2
+        farthest = np.maximum.reduceat(squared, offsets[:-1])
+        index = np.maximum.reduceat(np.where(squared == farthest[group], positions, -1), offsets[:-1])
+        cx += (east[index] - cx) / (step + 1)
+        cy += (north[index] - cy) / (step + 1)
+    upper = np.sqrt(np.maximum.reduceat((east - cx[group]) ** 2 + (north - cy[group]) ** 2, offsets[:-1]))
+    lower = np.maximum(upper / (1 + 1 / np.sqrt(iterations)),
+                       np.sqrt(np.maximum.reduceat(east ** 2 + north ** 2, offsets[:-1])) / 2)
+    return np.minimum(lower, upper), upper
+
+
+def _circle(points: list) -> tuple[float, float, float]:
+    if len(points) == 1:
+        return points[0][0], points[0][1], 0.0
+    if len(points) == 2:
+        (ax, ay), (bx, by) = points
+        return (ax + bx) / 2, (ay + by) / 2, np.hypot(ax - bx, ay - by) / 2
+    (ax, ay), (bx, by), (cx, cy) = points
+    d = 2 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+    if d == 0:
+        # collinear: the circle over the two points farthest apart
+        return max((_circle([p, q]) for p, q in ((points[0], points[1]), (points[0], points[2]),
+                                                  (points[1], points[2]))), key=lambda circle: circle[2])
+    ux = ((ax ** 2 + ay ** 2) * (by - cy) + (bx ** 2 + by ** 2) * (cy - ay) + (cx ** 2 + cy ** 2) * (ay - by)) / d
+    uy = ((ax ** 2 + ay ** 2) * (cx - bx) + (bx ** 2 + by ** 2) * (ax - cx) + (cx ** 2 + cy ** 2) * (bx - ax)) / d
+    return ux, uy, np.hypot(ax - ux, ay - uy)
+
+
+def exact_circle(east: np.ndarray, north: np.ndarray) -> float:
+    """
+    Minimum enclosing circle radius of one window (Welzl's algorithm in its iterative form, expected linear time).
+    """
+    order = np.random.default_rng(0).permutation(len(east))
+    points = list(zip(east[order].tolist(), north[order].tolist()))
+
+    def outside(circle, point):
+        return np.hypot(point[0] - circle[0], point[1] - circle[1]) > circle[2] * (1 + 1e-12) + 1e-9
+
+    circle = _circle(points[:1])
+    for i, p in enumerate(points):
+        if not outside(circle, p):
+            continue
+        circle = _circle([p])
+        for j, q in enumerate(points[:i]):
+            if not outside(circle, q):
+                continue
+            circle = _circle([p, q])
+            for r in points[:j]:
+                if outside(circle, r):
+                    circle = _circle([p, q, r])
+    return circle[2]
+
+
+def enclosing_circle(x, y, starts, stops, crs, tolerances=None) -> np.ndarray:
+    """
+    Minimum enclosing circle radius in metres of the window fixes of every track.
+
+    The radius is approximated for all tracks at once (see `approximate_circles`). Tracks whose bounds enclose
+    one of the `tolerances` are solved exactly, so comparing the result with any of them gives the same answer
+    as the exact radius. Without `tolerances` every track is solved exactly.
+
+    :return: radius per track, the approximation's upper bound where it is unambiguous
+    """
+    east, north, offsets = local_plane(x, y, starts, stops, crs)
+    if not len(east):
+        return np.zeros(0)
+    lower, upper = approximate_circles(east, north, offsets)
+    if tolerances is None:
+        ambiguous = np.ones(len(upper), dtype=bool)
+    else:
+        tolerances = np.atleast_1d(np.asarray(tolerances, dtype=np.float64))
+        ambiguous = ((lower[:, None] <= tolerances) & (tolerances < upper[:, None])).any(axis=1)
+    for window in np.flatnonzero(ambiguous):
+        begin, end = offsets[window], offsets[window + 1]
+        upper[window] = exact_circle(east[begin:end], north[begin:end])
+    return upper
+
+
+def window_metric(x: np.ndarray, y: np.ndarray, starts: np.ndarray, stops: np.ndarray, crs, metric: str,
+                  method: str = 'robinson', percentile: float = 90, tolerances=None) -> np.ndarray:
+    """
+    Computes a stationarity metric for windows with at least one fix.
+
+    :param x: x coordinates ordered by track and time
+    :param y: y coordinates ordered by track and time
+    :param starts: absolute start index of every window
+    :param stops: absolute stop index of every window
+    :param crs: CRS of the coordinates
+    :param metric: one of `METRICS` except `bbox`, which is handled with `app.window.window_bounds`
+    :param method: distance backend for `final_radius` and `percentile_radius`, see `app.distance.distances`
+    :param percentile: percentile of `percentile_radius`
+    :param tolerances: tolerances the result will be compared with, see `enclosing_circle`
+    :return: metric in metres per window
+    """
+    if metric == 'final_radius':
+        return final_radius(x, y, starts, stops, crs, method)
+    if metric == 'percentile_radius':
+        return percentile_radius(x, y, starts, stops, crs, method, percentile)
+    if metric == 'enclosing_circle':
+        return enclosing_circle(x, y, starts, stops, crs, tolerances)
+    raise ValueError(f'Unknown stationarity metric \'{metric}\', expected one of {list(METRICS)}')
+
+
+def scanned_metric(x: np.ndarray, y: np.ndarray, starts: np.ndarray, stops: np.ndarray, crs, metric: str,
+                   tolerances, method: str = 'robinson', block: int = SCAN_BLOCK) -> np.ndarray:
+    """
+    Computes one of the `MONOTONE_METRICS` scanning every window backwards from its final fix, in steps growing
+    fourfold, and stops as soon as the metric exceeds every one of the `tolerances`. A moving track costs about
+    one `block` of fixes, a stationary one about 4/3 of its window.
+
+    :return: metric in metres per window; where a window was cut short, the metric of the scanned part, which is a
+        lower bound above every tolerance, so comparisons with them match `window_metric`
+    """
+    if metric not in MONOTONE_METRICS:
+        raise ValueError(
+            f'Stationarity metric \'{metric}\' cannot be scanned, expected one of {list(MONOTONE_METRICS)}'
+        )
+    limit = np.max(tolerances)
+    values = np.empty(len(starts))
+    active = np.arange(len(starts))
+    while len(active):
+        begin = np.maximum(starts[active], stops[active] - block)
+        value = window_metric(x, y, begin, stops[active], crs, metric, method, tolerances=tolerances)
+        done = (begin == starts[active]) | (value > limit)
+        values[active[done]] = value[done]
+        active = active[~done]
+        block *= 4
+    return values
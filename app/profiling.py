@@ -0,0 +1,130 @@
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PROFILE_MODES = ('spans', 'pstats', 'collapsed')
+
+
+def peak_rss_mb():
+    """
+    :return: peak resident set size of the process so far in MiB, or None where it cannot be determined
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stack of one thread at a fixed interval and counts the stacks in the collapsed format used by
+    flamegraph.pl and speedscope (`outer;inner;leaf count`).
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def write(self, path: str):
+        with open(path, 'w') as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f'{stack} {count}\n')
+
+
+class Profiler:
+    """
+    Records wall time, CPU time and peak RSS of named spans of an app run and optionally writes a cProfile
+    dump (`profile.pstats`) and/or a sampled collapsed-stack file (`profile.collapsed`) as artifacts.
+
+    Enabled by the `APP_PROFILE` environment variable, a comma separated list of `spans`, `pstats` and
+    `collapsed`. Without it every span is a no-op.
+    """
+
+    def __init__(self, modes=(), moveapps_io=None):
+        self.modes = set(modes)
+        self.moveapps_io = moveapps_io
+        self.spans: list = []
+        self._profile = None
+        self._sampler = None
+
+    @classmethod
+    def from_environment(cls, moveapps_io=None) -> 'Profiler':
+        modes = {mode.strip() for mode in os.environ.get('APP_PROFILE', '').split(',') if mode.strip()}
+        unknown = modes - set(PROFILE_MODES)
+        if unknown:
+            logging.warning(f'Ignoring unknown APP_PROFILE modes {sorted(unknown)}, expected {PROFILE_MODES}')
+        return cls(modes & set(PROFILE_MODES), moveapps_io)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.modes)
+
+    def __enter__(self) -> 'Profiler':
+        if 'pstats' in self.modes:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        if 'collapsed' in self.modes:
+            self._sampler = StackSampler(threading.get_ident())
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+            path = self.moveapps_io.create_artifacts_file('profile.pstats')
+            self._profile.dump_stats(path)
+            logging.info(f'Created cProfile dump {path}')
+        if self._sampler is not None:
+            self._sampler.stop()
+            path = self.moveapps_io.create_artifacts_file('profile.collapsed')
+            self._sampler.write(path)
+            logging.info(f'Created collapsed stack profile {path}')
+
+    @contextmanager
+    def span(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record = {
+                'event': 'span',
+                'name': name,
+                'wall_s': round(time.perf_counter() - wall, 6),
+                'cpu_s': round(time.process_time() - cpu, 6),
+                'peak_rss_mb': peak_rss_mb(),
+            }
+            self.spans.append(record)
+            logging.info(json.dumps(record))
@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class TransformerCache:
+    """
+    Process-wide LRU cache of pyproj transformers keyed by (source CRS, target CRS).
+
+    Resolving a CRS and building its transformation pipeline is far more expensive than transforming a few
+    points, so transformers are built once and reused for as long as the process lives.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._transformers: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(crs) -> str:
+        return crs.srs if hasattr(crs, 'srs') else str(crs)
+
+    def get(self, source, target):
+        """
+        Provides the transformer between two CRS, building it on the first request.
+
+        :param source: anything accepted by `pyproj.CRS.from_user_input`
+        :param target: anything accepted by `pyproj.CRS.from_user_input`
+        :return: transformer with x/y (lon/lat) axis order
+        """
+        key = (self._key(source), self._key(target))
+        with self._lock:
+            transformer = self._transformers.get(key)
+            if transformer is not None:
+                self.hits += 1
+                self._transformers.move_to_end(key)
+                return transformer
+            self.misses += 1
+        from pyproj import Transformer
+
+        transformer = Transformer.from_crs(source, target, always_xy=True)
+        with self._lock:
+            self._transformers[key] = transformer
+            self._transformers.move_to_end(key)
+            while len(self._transformers) > self.maxsize:
+                self._transformers.popitem(last=False)
+        return transformer
+
+    def transform(self, xs, ys, source, target) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Transforms arrays of coordinates in bulk.
+
+        :param xs: x coordinates (longitudes for geographic CRS)
+        :param ys: y coordinates (latitudes for geographic CRS)
+        :param source: CRS of the input coordinates
+        :param target: CRS of the output coordinates
+        :return: transformed x and y arrays
+        """
+        xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+        transformer = self.get(source, target)
+        if xs.size == 1 and ys.size == 1:
+            # pyproj treats size 1 arrays as scalars and converts them with NumPy's deprecated float(array)
+            x, y = transformer.transform(xs.item(), ys.item())
+            return np.full(xs.shape, x), np.full(ys.shape, y)
+        xs, ys = transformer.transform(xs, ys)
+        return np.asarray(xs), np.asarray(ys)
+
+    def info(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._transformers),
+                    'maxsize': self.maxsize}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._transformers.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+transformers = TransformerCache()
+
+
+def get_transformer(source, target):
+    return transformers.get(source, target)
+
+
+def transform(xs, ys, source, target) -> tuple[np.ndarray, np.ndarray]:
+    return transformers.transform(xs, ys, source, target)
+
+
+def cache_info() -> dict:
+    return transformers.info()
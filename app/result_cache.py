@@ -0,0 +1,162 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+CACHE_VERSION = 1
+MANIFEST = 'manifest.json'
+FINGERPRINTS = 'fingerprints.json'
+CHUNK_SIZE = 8 * 2 ** 20
+# settings that do not change the results
+IGNORED_SETTINGS = ('workers',)
+
+
+class ResultCache:
+    """
+    Content-addressed cache of the artifacts of earlier runs, keyed by a fingerprint of the input file and the
+    app configuration.
+
+    The input file is hashed in chunks; the digest is remembered together with the file's size and
+    modification time, so an unchanged file is only hashed once. Entries are evicted least recently used
+    first once the cache grows beyond `max_bytes`, and fingerprints that no entry refers to any more are
+    dropped with them. Files are replaced atomically, so concurrent runs (e.g. batch workers) sharing one cache
+    directory never read a partially written one.
+
+    Enabled by the environment variable `APP_RESULT_CACHE_DIR`; `APP_RESULT_CACHE_MAX_MB` bounds its size
+    (default 500).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 500 * 2 ** 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # input digest of every key handed out, recorded in the entry stored under that key
+        self.sources = {}
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_environment(cls):
+        directory = os.environ.get('APP_RESULT_CACHE_DIR')
+        if not directory:
+            return None
+        return cls(directory, int(float(os.environ.get('APP_RESULT_CACHE_MAX_MB', '500')) * 2 ** 20))
+
+    def fingerprint(self, path: str) -> str:
+        """
+        :return: hex digest of the file content, reused while size and modification time are unchanged
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        index = self._read_index()
+        known = index.get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['digest']
+
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        # re-read right before writing to lose as few fingerprints of concurrent runs as possible
+        index = self._read_index()
+        index[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest.hexdigest()}
+        self._write_json(os.path.join(self.directory, FINGERPRINTS), index)
+        return index[path]['digest']
+
+    def _read_index(self) -> dict:
+        """
+        :return: the fingerprint index, empty when it does not exist or cannot be read
+        """
+        try:
+            with open(os.path.join(self.directory, FINGERPRINTS)) as file:
+                index = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return index if isinstance(index, dict) else {}
+
+    def _write_json(self, path: str, content) -> None:
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(content, file)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def key(self, source_file: str, config: dict) -> str:
+        settings = {name: value for name, value in config.items() if name not in IGNORED_SETTINGS}
+        source = self.fingerprint(source_file)
+        payload = json.dumps([CACHE_VERSION, source, settings], sort_keys=True, default=str)
+        key = hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+        self.sources[key] = source
+        return key
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def restore(self, key: str, moveapps_io) -> bool:
+        """
+        Copies the cached artifacts of `key` into the artifacts directory.
+
+        :return: whether there was a cache entry
+        """
+        entry = self._entry(key)
+        manifest_path = os.path.join(entry, MANIFEST)
+        if not os.path.exists(manifest_path):
+            logging.info(f'Result cache miss for {key}')
+            return False
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        for name in manifest['artifacts']:
+            shutil.copyfile(os.path.join(entry, name), moveapps_io.create_artifacts_file(name))
+        os.utime(manifest_path)
+        logging.info(f'Result cache hit for {key}, restored {len(manifest["artifacts"])} artifacts')
+        return True
+
+    def store(self, key: str, moveapps_io, artifacts: list) -> None:
+        entry = self._entry(key)
+        os.makedirs(entry, exist_ok=True)
+        for name in artifacts:
+            shutil.copyfile(moveapps_io.create_artifacts_file(name), os.path.join(entry, name))
+        self._write_json(os.path.join(entry, MANIFEST),
+                         {'artifacts': list(artifacts), 'created': time.time(), 'source': self.sources.get(key)})
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.directory):
+            manifest_path = os.path.join(self.directory, name, MANIFEST)
+            if not os.path.exists(manifest_path):
+                continue
+            entry = os.path.join(self.directory, name)
+            size = sum(os.path.getsize(os.path.join(entry, file)) for file in os.listdir(entry))
+            entries.append((os.path.getmtime(manifest_path), size, entry))
+        total = sum(size for _, size, _ in entries)
+        kept = []
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                kept.append(entry)
+                continue
+            shutil.rmtree(entry)
+            total -= size
+            logging.info(f'Evicted result cache entry {os.path.basename(entry)}')
+        self._prune_index(kept)
+
+    def _prune_index(self, entries: list) -> None:
+        """
+        Drops the fingerprints of files that are gone or that no remaining entry was computed from.
+        """
+        sources = set()
+        for entry in entries:
+            try:
+                with open(os.path.join(entry, MANIFEST)) as file:
+                    sources.add(json.load(file).get('source'))
+            except (OSError, ValueError):
+                continue
+        index = self._read_index()
+        pruned = {path: known for path, known in index.items()
+                  if known.get('digest') in sources and os.path.exists(path)}
+        if len(pruned) < len(index):
+            self._write_json(os.path.join(self.directory, FINGERPRINTS), pruned)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+import numpy as np
+from app import distance, metrics, window
+from app.track_store import TrackStore
+
+if TYPE_CHECKING:
+    import movingpandas as mpd
+
+
+def window_spread(t: np.ndarray, x: np.ndarray, y: np.ndarray, offsets: np.ndarray, stop_duration: float, crs,
+                  method: str = 'robinson', metric: str = 'bbox', percentile: float = 90, tolerances=None,
+                  max_fixes: int = None) -> np.ndarray:
+    """
+    Measures how far the fixes in the trailing `stop_duration` window of every track are spread.
+
+    Windows are located with a binary search per track (see `app.window`) instead of scanning every fix.
+
+    :param t: int64 nanosecond timestamps ordered by track and time, see `app.track_store.TrackStore`
+    :param x: x coordinate of every fix
+    :param y: y coordinate of every fix
+    :param offsets: the fixes of track i are at `offsets[i]:offsets[i + 1]`
+    :param stop_duration: window length in hours
+    :param crs: CRS of the fixes
+    :param method: distance backend, see `app.distance.distances`
+    :param metric: `bbox` (bounding box diagonal) or one of the radii of `app.metrics`
+    :param percentile: percentile of the `percentile_radius` metric
+    :param tolerances: tolerances the result will be compared with, see `app.metrics.enclosing_circle`. With
+        them the `app.metrics.MONOTONE_METRICS` stop scanning a window once it exceeds all of them
+        (see `app.metrics.scanned_metric`)
+    :param max_fixes: cap on the fixes per window, larger windows are thinned (see `app.window.thin_windows`)
+    :return: spread in metres per track, NaN where the window holds fewer than 2 fixes
+    """
+    spread = np.full(len(offsets) - 1, np.nan)
+    if metric == 'bbox' and not max_fixes:
+        count, minx, miny, maxx, maxy = window.window_bounds(t, x, y, offsets, stop_duration)
+        determined = count >= 2
+        if determined.any():
+            spread[determined] = distance.distances(
+                minx[determined], miny[determined], maxx[determined], maxy[determined], crs, method
+            )
+        return spread
+
+    starts, stops = window.trailing_windows(t, offsets, stop_duration)
+    determined = stops - starts >= 2
+    if max_fixes:
+        x, y, starts, stops = window.thin_windows(x, y, starts, stops, max(int(max_fixes), 2))
+    starts, stops = starts[determined], stops[determined]
+    if not determined.any():
+        return spread
+    if metric == 'bbox':
+        spread[determined] = distance.distances(
+            window.reduce_windows(x, starts, stops, np.fmin), window.reduce_windows(y, starts, stops, np.fmin),
+            window.reduce_windows(x, starts, stops, np.fmax), window.reduce_windows(y, starts, stops, np.fmax),
+            crs, method
+        )
+    elif metric in metrics.MONOTONE_METRICS and tolerances is not None:
+        spread[determined] = metrics.scanned_metric(x, y, starts, stops, crs, metric, tolerances, method)
+    else:
+        spread[determined] = metrics.window_metric(x, y, starts, stops, crs, metric, method, percentile, tolerances)
+    return spread
+
+
+def detect_chunk(t: np.ndarray, x: np.ndarray, y: np.ndarray, offsets: np.ndarray, codes: np.ndarray, crs,
+                 stop_duration: float, distance_tolerance: float, distance_method: str = 'robinson',
+                 metric: str = 'bbox', percentile: float = 90,
+                 max_fixes: int = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Runs the stationarity check on a set of whole tracks given as plain column arrays sharing one CRS.
+
+    :param t: int64 nanosecond timestamps ordered by track and time
+    :param x: x coordinate of every fix
+    :param y: y coordinate of every fix
+    :param offsets: the fixes of the i-th track are at `offsets[i]:offsets[i + 1]`
+    :param codes: track code of every track
+    :param crs: CRS of the coordinates
+    :param stop_duration: window length in hours
+    :param distance_tolerance: maximum spread in metres
+    :param distance_method: distance backend, see `app.distance.distances`
+    :param metric: how the spread is measured, see `window_spread`
+    :param percentile: percentile of the `percentile_radius` metric
+    :param max_fixes: cap on the fixes per window, see `window_spread`
+    :return: codes of the stationary tracks and codes of the tracks with fewer than 2 fixes in their window
+    """
+    spread = window_spread(
+        t, x, y, offsets, stop_duration, crs, distance_method, metric, percentile, [distance_tolerance], max_fixes
+    )
+    return codes[spread <= distance_tolerance], codes[np.isnan(spread)]
+
+
+def crs_groups(crs_list: list):
+    """
+    Groups tracks by their CRS, as distances are computed per CRS.
+
+    :param crs_list: CRS of every track, by track code
+    :return: iterator over `(crs, codes)` pairs with the ascending codes of the tracks in that CRS
+    """
+    groups = {str(crs): crs for crs in crs_list}
+    if len(groups) == 1:
+        yield crs_list[0], np.arange(len(crs_list))
+        return
+    crs_keys = np.array([str(crs) for crs in crs_list], dtype=object)
+    for key, crs in groups.items():
+        yield crs, np.flatnonzero(crs_keys == key)
+
+
+def select_tracks(store: TrackStore, codes: np.ndarray) -> tuple:
+    """
+    Provides the columns and offsets of some tracks of a store. A run of consecutive tracks is a view of the
+    store's arrays, other selections are copied.
+
+    :param store: the store to select from
+    :param codes: ascending codes of the selected tracks
+    :return: t, x, y and offsets of the selected tracks
+    """
+    begin, end = store.offsets[codes], store.offsets[codes + 1]
+    if len(codes) and codes[-1] - codes[0] + 1 == len(codes):
+        fixes = slice(begin[0], end[-1])
+        return store.t[fixes], store.x[fixes], store.y[fixes], np.r_[begin, end[-1]] - begin[0]
+    offsets = np.r_[0, np.cumsum(end - begin)].astype(np.int64)
+    index = np.arange(offsets[-1]) + np.repeat(begin - offsets[:-1], end - begin)
+    return store.t[index], store.x[index], store.y[index], offsets
+
+
+def _chunks(store: TrackStore, codes: np.ndarray, n_chunks: int) -> list[np.ndarray]:
+    """
+    Splits tracks into chunks with roughly equal numbers of fixes.
+    """
+    fixes = np.cumsum(store.offsets[codes + 1] - store.offsets[codes])
+    cuts = np.searchsorted(fixes, np.linspace(0, fixes[-1], n_chunks + 1)[1:-1]) if len(codes) else []
+    return [chunk for chunk in np.split(codes, np.unique(cuts)) if len(chunk)]
+
+
+def stationary_codes(store: TrackStore, config: dict) -> np.ndarray:
+    """
+    Determines which tracks of a store are stationary, see `stationary_track_ids`.
+
+    With a `workers` setting above 1 the tracks are sharded into chunks which are checked in a process pool.
+    Chunks are shipped as plain column arrays and the result does not depend on the worker count.
+    Daemonic processes, e.g. the workers of a concurrent batch, cannot start a pool and check all tracks themselves.
+
+    :param store: the fixes to check
+    :param config: app configuration, see `stationary_track_ids`
+    :return: sorted codes of the stationary tracks
+    """
+    workers = int(config.get("workers") or 1)
+    if workers > 1 and multiprocessing.current_process().daemon:
+        logging.info(f'running in a daemonic process, detecting with 1 instead of {workers} workers')
+        workers = 1
+    jobs = []
+    for crs, codes in crs_groups(store.crs):
+        chunks = _chunks(store, codes, workers * 4) if workers > 1 else [codes]
+        jobs.extend(select_tracks(store, chunk) + (chunk, crs) for chunk in chunks)
+
+    if not jobs:
+        return np.zeros(0, dtype=np.int64)
+    settings = (config["stop_duration"], config["distance_tolerance"], config.get("distance_method", 'robinson'),
+                config.get("stationarity_metric", 'bbox'), config.get("radius_percentile", 90),
+                config.get("max_window_fixes"))
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(detect_chunk, *zip(*jobs), *([value] * len(jobs) for value in settings)))
+    else:
+        results = [detect_chunk(*job, *settings) for job in jobs]
+
+    stopped = np.sort(np.concatenate([result[0] for result in results]))
+    undetermined = np.sort(np.concatenate([result[1] for result in results]))
+    for code in undetermined:
+        logging.error(f'Fewer than 2 entries for {store.ids[code]}, unable to make stationarity determination')
+    return stopped
+
+
+def stationary_track_ids(data: mpd.TrajectoryCollection, config: dict, store: TrackStore = None) -> list:
+    """
+    Determines which trajectories of a collection are stationary, equivalent to calling `App.stopped` on each.
+
+    The fixes are read into a `TrackStore` and checked with `stationary_codes`.
+
+    :param data: the collection to check
+    :param config: app configuration with `stop_duration` (hours), `distance_tolerance` (metres) and optionally
+        `distance_method`, `stationarity_metric`, `radius_percentile`, `max_window_fixes` and `workers`
+    :param store: fixes to check instead of the whole collection, as long as they contain every trailing window
+        (see `app.incremental`)
+    :return: IDs of the stationary trajectories in collection order
+    """
+    if store is None:
+        store = TrackStore.from_collection(data)
+    return [store.ids[code] for code in stationary_codes(store, config)]
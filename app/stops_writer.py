@@ -0,0 +1,110 @@
+"""
+Streams the stationary tags into tabular artifacts without going through the geometry WKT.
+"""
+import gzip
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_COLUMNS = ('trackId', 'timestamp', 'lon', 'lat')
+CHUNK_SIZE = 100_000
+# suffix of the optional extra copy of the csv per format
+EXPORTS = {
+    'gzip': '.csv.gz',
+    'zstd': '.csv.zst',
+    'parquet': '.parquet',
+}
+
+
+def parse_columns(value) -> list:
+    """
+    :param value: comma separated string or list of column names, falsy for the default
+    """
+    if not value:
+        return list(DEFAULT_COLUMNS)
+    if isinstance(value, str):
+        value = value.split(',')
+    return [column.strip() for column in value if column.strip()]
+
+
+def stop_columns(stops: pd.DataFrame, columns: list, end_times: list = None) -> dict:
+    """
+    Resolves the output columns of the stops to plain arrays.
+
+    `lon` and `lat` are taken from the point coordinates and `timestamp` from the `timestamps` column, or from
+    `end_times` (the end time of every stop row) when there is none. Every other name is a column of `stops`.
+
+    :return: array per column name, in the order of `columns`
+    """
+    arrays = {}
+    for column in columns:
+        if column == 'lon':
+            arrays[column] = stops.geometry.x.values if len(stops) else np.empty(0)
+        elif column == 'lat':
+            arrays[column] = stops.geometry.y.values if len(stops) else np.empty(0)
+        elif column == 'timestamp' and 'timestamp' not in stops.columns:
+            if 'timestamps' in stops.columns:
+                arrays[column] = stops['timestamps'].values
+            else:
+                times = list(end_times) if end_times is not None else [None] * len(stops)
+                arrays[column] = pd.to_datetime(pd.Series(times, dtype=object)).values
+        elif column in stops.columns:
+            arrays[column] = stops[column].values
+        elif stops.empty:
+            # get_end_locations() of no trajectories has no columns at all
+            arrays[column] = np.empty(0)
+        else:
+            raise ValueError(f'Unknown csv column \'{column}\', expected one of '
+                             f'{sorted(set(DEFAULT_COLUMNS) | set(stops.columns) - {"geometry"})}')
+    return arrays
+
+
+def _open(path: str, compression: str = None):
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', newline='')
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.open(path, 'wt', newline='')
+    return open(path, 'w', newline='')
+
+
+def write_csv(arrays: dict, path: str, compression: str = None, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Writes the columns as csv in chunks of `chunk_size` rows, so only one chunk is formatted at a time.
+
+    :param arrays: array per column name, as returned by `stop_columns`
+    :param path: file to write
+    :param compression: None, `gzip` or `zstd`
+    :return: number of rows written
+    """
+    rows = len(next(iter(arrays.values()))) if arrays else 0
+    with _open(path, compression) as file:
+        file.write(','.join(arrays) + '\n')
+        for begin in range(0, rows, chunk_size):
+            chunk = pd.DataFrame({name: values[begin:begin + chunk_size] for name, values in arrays.items()})
+            chunk.to_csv(file, header=False, index=False, lineterminator='\n')
+    return rows
+
+
+def write_parquet(arrays: dict, path: str, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Writes the columns as Parquet with one row group per chunk of `chunk_size` rows. Needs pyarrow.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = len(next(iter(arrays.values()))) if arrays else 0
+    writer = None
+    try:
+        for begin in range(0, max(rows, 1), chunk_size):
+            chunk = pa.Table.from_pandas(
+                pd.DataFrame({name: values[begin:begin + chunk_size] for name, values in arrays.items()}),
+                schema=writer.schema if writer is not None else None, preserve_index=False
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(path, chunk.schema)
+            writer.write_table(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from app.stationarity import crs_groups, select_tracks, window_spread
+from app.track_store import TrackStore
+
+if TYPE_CHECKING:
+    import movingpandas as mpd
+
+SWEEP_FILE = 'stationary_sweep.csv'
+
+
+def is_sweep(config: dict) -> bool:
+    """
+    :return: whether `stop_duration` or `distance_tolerance` is configured as a list of values
+    """
+    return isinstance(config["stop_duration"], list) or isinstance(config["distance_tolerance"], list)
+
+
+def _values(value) -> list:
+    return sorted(value) if isinstance(value, list) else [value]
+
+
+def spreads(data: mpd.TrajectoryCollection, stop_duration: float, config: dict, tolerances=None,
+            store: TrackStore = None) -> np.ndarray:
+    """
+    Computes the spread (see `app.stationarity.window_spread`) of the trailing `stop_duration` window of every
+    trajectory, measured as configured by `distance_method`, `stationarity_metric`, `radius_percentile` and
+    `max_window_fixes`.
+
+    :return: spread per trajectory in collection order, NaN where the window holds fewer than 2 fixes
+    """
+    if store is None:
+        store = TrackStore.from_collection(data)
+    lengths = np.full(len(store), np.nan)
+    for crs, codes in crs_groups(store.crs):
+        lengths[codes] = window_spread(
+            *select_tracks(store, codes), stop_duration, crs, config.get("distance_method", 'robinson'),
+            config.get("stationarity_metric", 'bbox'), config.get("radius_percentile", 90), tolerances,
+            config.get("max_window_fixes")
+        )
+    return lengths
+
+
+def sweep(data: mpd.TrajectoryCollection, config: dict) -> pd.DataFrame:
+    """
+    Determines the stationary trajectories for every combination of the configured stop durations and distance
+    tolerances. The windows and their spread are computed once per duration; every tolerance is then a
+    comparison against those spreads.
+
+    :param data: the collection to check
+    :param config: app configuration where `stop_duration` (hours) and/or `distance_tolerance` (metres) are lists
+    :return: one row per `stop_duration` and `distance_tolerance` pair with the `count` of stationary tags and
+        their `trackIds` (`;` separated, in collection order)
+    """
+    store = TrackStore.from_collection(data)
+    ids = np.array([str(track_id) for track_id in store.ids], dtype=object)
+    tolerances = _values(config["distance_tolerance"])
+    rows = []
+    for stop_duration in _values(config["stop_duration"]):
+        lengths = spreads(data, stop_duration, config, tolerances, store)
+        undetermined = np.isnan(lengths).sum()
+        if undetermined:
+            logging.error(f'Fewer than 2 entries within {stop_duration} hours for {undetermined} tags, '
+                          f'unable to make stationarity determination')
+        for distance_tolerance in tolerances:
+            stopped = ids[lengths <= distance_tolerance]
+            rows.append({'stop_duration': stop_duration, 'distance_tolerance': distance_tolerance,
+                         'count': len(stopped), 'trackIds': ';'.join(stopped)})
+    return pd.DataFrame(rows, columns=['stop_duration', 'distance_tolerance', 'count', 'trackIds'])
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from app import window
+
+if TYPE_CHECKING:
+    import geopandas as gpd
+    import movingpandas as mpd
+
+
+class TrackStore:
+    """
+    Compact column store of the fixes of many tracks for the detection path: contiguous int64 nanosecond
+    timestamps and float64 coordinates ordered by track and time, with the fixes of track i at
+    `offsets[i]:offsets[i + 1]`. Holds no geometries and no per-track frames.
+
+    `source` is what the store was read from, the trajectories or a GeoDataFrame of fixes, and is only used to
+    look up the rows of single fixes (see `first_values` and `end_locations`). For a GeoDataFrame, `first` and
+    `last` hold the row positions of the first and the final fix of every track in it and `time_column` names its
+    timestamp column, if any.
+    """
+
+    __slots__ = ('ids', 'crs', 't', 'x', 'y', 'offsets', 'source', 'first', 'last', 'time_column')
+
+    def __init__(self, ids: list, crs: list, t: np.ndarray, x: np.ndarray, y: np.ndarray, offsets: np.ndarray,
+                 source=None, first: np.ndarray = None, last: np.ndarray = None, time_column: str = None):
+        self.ids = ids
+        self.crs = crs
+        self.t = t
+        self.x = x
+        self.y = y
+        self.offsets = offsets
+        self.source = source
+        self.first = first
+        self.last = last
+        self.time_column = time_column
+
+    @classmethod
+    def from_collection(cls, data: mpd.TrajectoryCollection) -> TrackStore:
+        """
+        Builds the store from a TrajectoryCollection (or a list of trajectories), in collection order.
+
+        A collection read from a columnar file whose trajectories have not been built yet is read straight from
+        its table of fixes, see `from_points`.
+        """
+        if not getattr(data, 'loaded', True):
+            return cls.from_points(data.points, data.traj_id_col, data.t)
+        trajectories = list(data)
+        lengths = np.fromiter((len(traj.df) for traj in trajectories), dtype=np.int64, count=len(trajectories))
+        n = int(lengths.sum())
+        t, x, y = np.empty(n, dtype=np.int64), np.empty(n, dtype=np.float64), np.empty(n, dtype=np.float64)
+        offsets = np.r_[0, np.cumsum(lengths)].astype(np.int64)
+        for traj, begin, end in zip(trajectories, offsets[:-1], offsets[1:]):
+            # fill the preallocated arrays directly, no per-track intermediate copies are kept
+            t[begin:end] = window.timestamps_ns(traj.df.index)
+            geometry = traj.df.geometry.values
+            x[begin:end] = geometry.x
+            y[begin:end] = geometry.y
+        return cls([traj.id for traj in trajectories], [traj.crs for traj in trajectories], t, x, y, offsets,
+                   trajectories)
+
+    @classmethod
+    def from_points(cls, points: gpd.GeoDataFrame, id_column: str, time_column: str = None) -> TrackStore:
+        """
+        Builds the store straight from the columns of a GeoDataFrame of fixes, with the tracks of
+        `TrajectoryCollection(points, id_column, t=time_column)`: ordered by ID, fixes ordered by time keeping the
+        first of equal timestamps, and without tracks of fewer than 2 fixes.
+
+        :param points: fixes in any order
+        :param id_column: column holding the track ID
+        :param time_column: column holding the timestamp, None to use the DatetimeIndex
+        """
+        codes, uniques = pd.factorize(points[id_column], sort=True)
+        times = points.index if time_column is None else pd.to_datetime(points[time_column])
+        t = window.timestamps_ns(times)
+        order = np.lexsort((t, codes))
+        order = order[codes[order] >= 0]
+        codes, t = codes[order], t[order]
+        # the first of equal timestamps of a track is kept, like `Trajectory` dropping duplicated index values
+        kept = np.r_[True, (codes[1:] != codes[:-1]) | (t[1:] != t[:-1])][:len(order)]
+        geometry = points.geometry.values
+        # tracks need 2 fixes with a geometry, like `TrajectoryCollection` requires of every trajectory
+        valid = np.bincount(codes[kept], weights=~geometry.isna()[order[kept]], minlength=len(uniques)) >= 2
+        kept &= valid[codes]
+        order, codes, t = order[kept], codes[kept], t[kept]
+
+        tracks = np.flatnonzero(valid)
+        offsets = np.r_[0, np.cumsum(np.bincount(codes, minlength=len(uniques))[tracks])].astype(np.int64)
+        geometry = geometry[order]
+        return cls(list(uniques[tracks]), [points.crs] * len(tracks), t, geometry.x, geometry.y, offsets, points,
+                   order[offsets[:-1]], order[offsets[1:] - 1], time_column)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.t.nbytes + self.x.nbytes + self.y.nbytes + self.offsets.nbytes
+
+    def first_values(self, column: str) -> list:
+        """
+        :return: value of `column` in the first fix of every track
+        """
+        if self.first is None:
+            return [traj.df[column].iloc[0] for traj in self.source]
+        return list(self.source[column].values[self.first])
+
+    def end_locations(self, codes) -> gpd.GeoDataFrame:
+        """
+        Provides the final fix of the selected tracks, like `TrajectoryCollection.filter(...).get_end_locations()`
+        but only touching the selected tracks.
+
+        :param codes: positions of the selected tracks
+        :return: one row per selected track, an empty GeoDataFrame if none is selected
+        """
+        from geopandas import GeoDataFrame
+
+        codes = np.asarray(codes, dtype=np.int64)
+        if not len(codes):
+            return GeoDataFrame()
+        if self.last is None:
+            rows = [self.source[code].df.iloc[-1] for code in codes]
+        else:
+            final = self.source.iloc[self.last[codes]]
+            if self.time_column is not None:
+                # the timestamp is the index of a trajectory, not one of its columns
+                final = final.drop(columns=self.time_column)
+            rows = [row for _, row in final.iterrows()]
+        # one frame per row like `get_end_locations`, which determines the dtypes of the result
+        return GeoDataFrame(pd.concat([row.to_frame().T for row in rows], ignore_index=True))
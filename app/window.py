@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+
+def timestamps_ns(times) -> np.ndarray:
+    """
+    Provides timestamps as int64 nanoseconds without copying where possible.
+
+    Time zone aware timestamps keep their local wall time, the same way movingpandas drops time zones.
+
+    :param times: DatetimeIndex, datetime Series or datetime64/int64 array
+    :return: int64 nanoseconds since the epoch
+    """
+    if isinstance(times, pd.Series):
+        times = pd.DatetimeIndex(times)
+    if isinstance(times, pd.DatetimeIndex):
+        if times.tz is not None:
+            times = times.tz_localize(None)
+        times = times.values
+    times = np.asarray(times)
+    if times.dtype.kind == 'M':
+        return times.astype('datetime64[ns]', copy=False).view(np.int64)
+    return times.astype(np.int64, copy=False)
+
+
+def duration_ns(stop_duration: float) -> int:
+    return pd.Timedelta(timedelta(hours=stop_duration)).value
+
+
+def is_sorted(track: np.ndarray, t: np.ndarray) -> bool:
+    """
+    Checks in one pass whether fixes are ordered by track and, within each track, by time.
+    """
+    same = track[1:] == track[:-1]
+    return bool(np.all((track[1:] > track[:-1]) | (same & (t[1:] >= t[:-1]))))
+
+
+def sort_order(track: np.ndarray, t: np.ndarray):
+    """
+    :return: permutation that orders fixes by track and time, or None if they are ordered already
+    """
+    if is_sorted(track, t):
+        return None
+    return np.lexsort((t, track))
+
+
+def segment_offsets(track: np.ndarray) -> np.ndarray:
+    """
+    :return: start offset of every run of equal track codes, followed by the total length
+    """
+    return np.r_[np.flatnonzero(np.r_[True, track[1:] != track[:-1]]), len(track)].astype(np.int64)
+
+
+def segmented_searchsorted(t: np.ndarray, begin: np.ndarray, end: np.ndarray, targets: np.ndarray,
+                           side: str = 'left') -> np.ndarray:
+    """
+    Binary search of one target per sorted segment `t[begin:end]`, vectorized across all segments.
+
+    :return: insertion index of each target into its segment, as an absolute index into `t`
+    """
+    lo = np.asarray(begin, dtype=np.int64).copy()
+    hi = np.asarray(end, dtype=np.int64).copy()
+    last = max(len(t) - 1, 0)
+    active = lo < hi
+    while active.any():
+        mid = np.minimum((lo + hi) // 2, last)
+        values = t[mid]
+        right = (values < targets) if side == 'left' else (values <= targets)
+        lo = np.where(active & right, mid + 1, lo)
+        hi = np.where(active & ~right, mid, hi)
+        active = lo < hi
+    return lo
+
+
+def trailing_windows(t: np.ndarray, offsets: np.ndarray, stop_duration: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Locates the trailing `stop_duration` window of every track of sorted fixes.
+
+    Mirrors `Trajectory.get_segment_between(end - stop_duration, end)`: both ends are inclusive and the end
+    time is truncated to microseconds like `Trajectory.get_end_time`.
+
+    :param t: int64 nanosecond timestamps ordered by track and time
+    :param offsets: track offsets as returned by `segment_offsets`
+    :param stop_duration: window length in hours
+    :return: absolute start and stop index of each track's window
+    """
+    begin, end = offsets[:-1], offsets[1:]
+    ends = t[end - 1]
+    ends = ends - ends % 1000
+    starts = segmented_searchsorted(t, begin, end, ends - duration_ns(stop_duration), side='left')
+    stops = segmented_searchsorted(t, begin, end, ends, side='right')
+    return starts, stops
+
+
+def reduce_windows(values: np.ndarray, starts: np.ndarray, stops: np.ndarray, ufunc) -> np.ndarray:
+    """
+    Applies a reduction such as `np.fmin` to `values[start:stop]` of every window in one `reduceat` call.
+
+    Empty windows yield NaN.
+    """
+    if len(starts) == 0:
+        return np.empty(0)
+    padded = np.append(np.asarray(values, dtype=np.float64), np.nan)
+    indices = np.empty(2 * len(starts), dtype=np.int64)
+    indices[0::2] = starts
+    indices[1::2] = stops
+    reduced = ufunc.reduceat(padded, indices)[0::2]
+    return np.where(stops > starts, reduced, np.nan)
+
+
+def thin_windows(x: np.ndarray, y: np.ndarray, starts: np.ndarray, stops: np.ndarray,
+                 max_fixes: int) -> tuple[np.ndarray, ...]:
+    """
+    Temporal thinning: caps every window at `max_fixes` fixes by keeping every k-th fix counted back from the
+    final fix, with k the smallest stride that fits. The final fix is always kept.
+
+    :return: the kept x and y coordinates, ordered by window and time, with the start and stop index of every
+        window into them
+    """
+    lengths = stops - starts
+    strides = np.maximum(-(-lengths // max_fixes), 1)
+    kept = -(-lengths // strides)
+    offsets = np.r_[0, np.cumsum(kept)].astype(np.int64)
+    remaining = np.repeat(offsets[1:], kept) - 1 - np.arange(offsets[-1])
+    index = np.repeat(stops - 1, kept) - np.repeat(strides, kept) * remaining
+    return x[index], y[index], offsets[:-1], offsets[1:]
+
+
+def window_bounds(t: np.ndarray, x: np.ndarray, y: np.ndarray, offsets: np.ndarray,
+                  stop_duration: float) -> tuple[np.ndarray, ...]:
+    """
+    Computes the number of fixes and the bounding box of the trailing window of every track.
+
+    :return: count, minx, miny, maxx and maxy arrays with one entry per track
+    """
+    starts, stops = trailing_windows(t, offsets, stop_duration)
+    return (
+        stops - starts,
+        reduce_windows(x, starts, stops, np.fmin),
+        reduce_windows(y, starts, stops, np.fmin),
+        reduce_windows(x, starts, stops, np.fmax),
+        reduce_windows(y, starts, stops, np.fmax),
+    )
+
+
+def trailing_bounds(times, x: np.ndarray, y: np.ndarray, stop_duration: float) -> tuple[int, tuple]:
+    """
+    Computes the trailing window of a single track from its raw arrays, without building a segment Trajectory.
+
+    :param times: timestamps of the track, in any order and with or without time zone
+    :param x: x coordinates of the track
+    :param y: y coordinates of the track
+    :param stop_duration: window length in hours
+    :return: number of fixes in the window and its bounding box (minx, miny, maxx, maxy)
+    """
+    t = timestamps_ns(times)
+    track = np.zeros(len(t), dtype=np.int64)
+    order = sort_order(track, t)
+    if order is not None:
+        t, x, y = t[order], np.asarray(x)[order], np.asarray(y)[order]
+    count, minx, miny, maxx, maxy = window_bounds(t, x, y, np.array([0, len(t)], dtype=np.int64), stop_duration)
+    return int(count[0]), (minx[0], miny[0], maxx[0], maxy[0])
@@ -0,0 +1,197 @@
+"""
+Times the phases of the stationarity pipeline on synthetic data and reports wall time and peak memory per phase.
+
+    python benchmarks/pipeline.py --tracks 100,1000 --fixes 500 --json results.json
+    python benchmarks/pipeline.py --tracks 100,1000 --fixes 500 --compare results.json --threshold 0.25
+
+Phases: `load` (MoveAppsExecutor reading the pickled collection), `store` (building the TrackStore the
+detection reads, with its size next to the size of the trajectory frames), `detection` (App.end_locations, plus
+`detection_<metric>` for every other `--metric`), `csv` (App.write_csv) and `html` (App.plot_map for every
+`--renderer`). Peak memory is the tracemalloc peak
+of the phase. `--compare` exits with status 1 when a phase is slower than the baseline by more than
+`--threshold`.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.synthetic import Scenario, collection  # noqa: E402
+
+
+def measure(function, *args, **kwargs) -> tuple:
+    """
+    :return: the result of the call, its wall time in seconds and its peak traced memory in MiB
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return result, seconds, peak / 2 ** 20
+
+
+def load(source_file: str, output_file: str):
+    import pluggy
+    from sdk.moveapps_execution import MoveAppsExecutor
+    from sdk.moveapps_spec import HOOK_NAMESPACE, MoveAppsSpec, hook_impl
+
+    class Capture:
+        data = None
+
+        @hook_impl
+        def execute(self, data, config):
+            Capture.data = data
+            return data
+
+    pm = pluggy.PluginManager(HOOK_NAMESPACE)
+    pm.add_hookspecs(MoveAppsSpec)
+    pm.register(Capture())
+    os.environ.update(SOURCE_FILE=source_file, OUTPUT_FILE=output_file, CONFIGURATION='{}')
+    MoveAppsExecutor(plugin_manager=pm).execute()
+    return Capture.data
+
+
+def run_scenario(scenario: Scenario, config: dict, renderers: list, workdir: str, metrics: tuple = ()) -> dict:
+    import pandas as pd
+    from app.app import App
+    from app.track_store import TrackStore
+    from sdk.moveapps_io import MoveAppsIo
+
+    os.environ['APP_ARTIFACTS_DIR'] = workdir
+    source_file = os.path.join(workdir, 'input.pickle')
+    pd.to_pickle(collection(scenario), source_file)
+
+    phases = {}
+    data, seconds, peak = measure(load, source_file, os.path.join(workdir, 'output.pickle'))
+    phases['load'] = {'seconds': seconds, 'peak_mb': peak}
+
+    store, seconds, peak = measure(TrackStore.from_collection, data)
+    phases['store'] = {'seconds': seconds, 'peak_mb': peak, 'store_mb': store.nbytes / 2 ** 20,
+                       'collection_mb': sum(traj.df.memory_usage(deep=True).sum() for traj in data) / 2 ** 20}
+    del store
+
+    app = App(moveapps_io=MoveAppsIo())
+    stops, seconds, peak = measure(app.end_locations, data, config)
+    phases['detection'] = {'seconds': seconds, 'peak_mb': peak, 'stops': len(stops)}
+    for metric in metrics:
+        if metric == config.get('stationarity_metric', 'bbox'):
+            continue
+        compared, seconds, peak = measure(app.end_locations, data, dict(config, stationarity_metric=metric))
+        phases[f'detection_{metric}'] = {'seconds': seconds, 'peak_mb': peak, 'stops': len(compared)}
+
+    _, seconds, peak = measure(app.write_csv, stops, config)
+    phases['csv'] = {'seconds': seconds, 'peak_mb': peak}
+
+    for renderer in renderers:
+        if stops.empty:
+            break
+        try:
+            _, seconds, peak = measure(app.plot_map, stops, dict(config, map_renderer=renderer))
+            phases[f'html_{renderer}'] = {'seconds': seconds, 'peak_mb': peak}
+        except Exception as error:  # a broken plotting stack should not abort the other measurements
+            phases[f'html_{renderer}'] = {'error': repr(error)}
+    return {'scenario': scenario.to_dict(), 'key': scenario.key, 'config': config, 'phases': phases}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    :return: one message per phase that got slower than the baseline by more than `threshold`
+    """
+    previous = {result['key']: result for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        before = previous.get(result['key'])
+        if before is None:
+            continue
+        for phase, measured in result['phases'].items():
+            reference = before['phases'].get(phase, {}).get('seconds')
+            if reference is None or 'seconds' not in measured:
+                continue
+            if measured['seconds'] > reference * (1 + threshold):
+                regressions.append(
+                    f'{result["key"]} {phase}: {measured["seconds"]:.3f}s vs {reference:.3f}s baseline'
+                )
+    return regressions
+
+
+def parse_list(value: str, cast) -> list:
+    return [cast(item) for item in value.split(',') if item]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tracks', default='100', help='comma separated numbers of tracks')
+    parser.add_argument('--fixes', default='500', help='comma separated numbers of fixes per track')
+    parser.add_argument('--stationary', default='0.2', help='comma separated fractions of stationary tracks')
+    parser.add_argument('--crs', default='EPSG:4326', help='comma separated CRS, see benchmarks.synthetic.ORIGINS')
+    parser.add_argument('--stop-duration', type=float, default=12)
+    parser.add_argument('--distance-tolerance', type=float, default=100)
+    parser.add_argument('--metric', default='bbox',
+                        help='comma separated stationarity metrics to time the detection with, the first one is used '
+                             'for the other phases')
+    parser.add_argument('--max-window-fixes', type=int, help='thin the detection windows to this many fixes')
+    parser.add_argument('--renderer', default='leaflet', help='comma separated map renderers, empty to skip')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='baseline results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown, 0.2 = 20%%')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    metrics = parse_list(args.metric, str)
+    config = {"stop_duration": args.stop_duration, "distance_tolerance": args.distance_tolerance,
+              "stationarity_metric": metrics[0], "max_window_fixes": args.max_window_fixes}
+    scenarios = [
+        Scenario(tracks=tracks, fixes=fixes, stationary_fraction=fraction, crs=crs, seed=args.seed)
+        for tracks, fixes, fraction, crs in itertools.product(
+            parse_list(args.tracks, int), parse_list(args.fixes, int),
+            parse_list(args.stationary, float), parse_list(args.crs, str)
+        )
+    ]
+    results = {
+        'meta': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'created': datetime.now().isoformat(timespec='seconds')},
+        'results': [],
+    }
+    for scenario in scenarios:
+        with tempfile.TemporaryDirectory() as workdir:
+            result = run_scenario(scenario, config, parse_list(args.renderer, str), workdir, metrics)
+        results['results'].append(result)
+        print(scenario.key)
+        for phase, measured in result['phases'].items():
+            if 'error' in measured:
+                print(f'    {phase:<30}{measured["error"]}')
+            else:
+                line = f'    {phase:<30}{measured["seconds"]:>9.3f} s{measured["peak_mb"]:>10.1f} MiB'
+                if 'store_mb' in measured:
+                    line += f'  ({measured["store_mb"]:.1f} MiB arrays vs {measured["collection_mb"]:.1f} MiB frames)'
+                print(line)
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Measures the import time of the SDK entry points, like `python -X importtime`, but summarised per module.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --json startup.json
+    python benchmarks/startup.py --max-ms app.app=600 --max-ms sdk=100
+
+Every module is imported in a fresh interpreter. Exits with status 1 when a module exceeds its `--max-ms` budget.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
+MODULES = ['sdk', 'sdk.moveapps_spec', 'sdk.moveapps_io', 'sdk.moveapps_execution', 'app.app']
+
+
+def import_times(module: str) -> dict:
+    """
+    Imports `module` in a fresh interpreter with `-X importtime`.
+
+    :return: total import time of `module` and the cumulative time of its slowest direct imports, in milliseconds
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, name.strip(), int(cumulative_us)))
+    # importtime lists every module after the modules it imported, so the direct imports of `module` are the
+    # depth 1 rows between its own row and the previous top-level row.
+    end = max(index for index, row in enumerate(rows) if row[0] == 0 and row[1] == module)
+    start = end
+    while start > 0 and rows[start - 1][0] > 0:
+        start -= 1
+    children = sorted(((name, cumulative) for depth, name, cumulative in rows[start:end] if depth == 1),
+                      key=lambda item: item[1], reverse=True)
+    return {'total_ms': rows[end][2] / 1000,
+            'slowest': {name: cumulative / 1000 for name, cumulative in children[:5]}}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--max-ms', action='append', default=[], metavar='MODULE=MS',
+                        help='fail when the import of MODULE takes longer than MS milliseconds')
+    args = parser.parse_args()
+
+    budgets = {module: float(ms) for module, ms in (item.split('=') for item in args.max_ms)}
+    results = {module: import_times(module) for module in args.modules}
+    failed = False
+    for module, result in results.items():
+        budget = budgets.get(module)
+        over = budget is not None and result['total_ms'] > budget
+        failed |= over
+        print(f'{module:<28}{result["total_ms"]:>10.1f} ms' + ('  OVER BUDGET' if over else ''))
+        for name, ms in result['slowest'].items():
+            print(f'    {name:<24}{ms:>10.1f} ms')
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Seeded generators of synthetic TrajectoryCollections for benchmarking the stationarity pipeline.
+"""
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+# Origins of the generated tracks per CRS: Kruger National Park in lon/lat and in UTM zone 36S metres.
+ORIGINS = {
+    'EPSG:4326': (31.5, -24.0),
+    'EPSG:32736': (350000.0, 7345000.0),
+}
+METRES_PER_DEGREE = 111320.0
+
+
+@dataclass
+class Scenario:
+    tracks: int = 100
+    fixes: int = 500
+    stationary_fraction: float = 0.2
+    crs: str = 'EPSG:4326'
+    interval_minutes: int = 60
+    stationary_hours: int = 24
+    seed: int = 0
+
+    @property
+    def key(self) -> str:
+        return f'{self.tracks}x{self.fixes}-{self.stationary_fraction:g}-{self.crs}'
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def fixes_frame(scenario: Scenario) -> pd.DataFrame:
+    """
+    Generates the fixes of a scenario as a flat frame with `trackId`, `timestamps`, `timestamp_tz`, `x`, `y` and
+    the ground truth `stationary`.
+
+    Every track is a random walk with steps of up to a few hundred metres. A `stationary_fraction` of the tracks
+    stays within a few metres of its last position for the final `stationary_hours`.
+    """
+    rng = np.random.default_rng(scenario.seed)
+    n, m = scenario.tracks, scenario.fixes
+    origin_x, origin_y = ORIGINS[scenario.crs]
+    scale = 1.0 if scenario.crs != 'EPSG:4326' else 1 / METRES_PER_DEGREE
+
+    steps = rng.normal(0, 200, size=(n, m, 2))
+    stationary = rng.random(n) < scenario.stationary_fraction
+    still = min(m, scenario.stationary_hours * 60 // scenario.interval_minutes + 1)
+    steps[stationary, m - still:, :] = 0
+    positions = np.cumsum(steps, axis=1)
+    positions[stationary, m - still:, :] += rng.normal(0, 2, size=(stationary.sum(), still, 2))
+    offsets = rng.uniform(-50000, 50000, size=(n, 1, 2))
+    positions = (positions + offsets) * scale
+
+    starts = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 48, size=n), unit='h')
+    times = starts.values[:, None] + np.arange(m)[None, :] * np.timedelta64(scenario.interval_minutes, 'm')
+    return pd.DataFrame({
+        'trackId': np.repeat([f'track-{i}' for i in range(n)], m),
+        'timestamps': times.ravel(),
+        'timestamp_tz': times.ravel(),
+        'x': origin_x + positions[:, :, 0].ravel(),
+        'y': origin_y + positions[:, :, 1].ravel(),
+        'stationary': np.repeat(stationary, m),
+    })
+
+
+def collection(scenario: Scenario):
+    """
+    Generates a TrajectoryCollection for a scenario, shaped like the output of `utils.input_converter`.
+    """
+    import movingpandas as mpd
+
+    return mpd.TrajectoryCollection(
+        fixes_frame(scenario), traj_id_col='trackId', t='timestamp_tz', x='x', y='y', crs=scenario.crs
+    )
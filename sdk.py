@@ -20,7 +20,7 @@ class MoveAppsSdk:
                 self._pm.register(hook)
 
         executor = MoveAppsExecutor(plugin_manager=self._pm)
-        executor.execute()
+        executor.run()
 
 
 if __name__ == "__main__":
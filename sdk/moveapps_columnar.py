@@ -0,0 +1,43 @@
+import geopandas as gpd
+import movingpandas as mpd
+
+
+class ColumnarTrajectoryCollection(mpd.TrajectoryCollection):
+    """
+    TrajectoryCollection over a table of fixes read from a columnar file. The Trajectory objects are only built
+    when they are first used; column based consumers read the fixes from `points` without building them.
+
+    Trajectories are grouped by the track ID column, so `traj.id` is the track ID of its fixes.
+    """
+
+    def __init__(self, points: gpd.GeoDataFrame, traj_id_col: str, t: str):
+        self.points = points
+        self.traj_id_col = traj_id_col
+        self.t = t
+        self.min_length = 0
+        self.min_duration = None
+        self._trajectories = None
+
+    @property
+    def loaded(self) -> bool:
+        """
+        :return: whether the Trajectory objects have been built
+        """
+        return self._trajectories is not None
+
+    @property
+    def trajectories(self) -> list:
+        if self._trajectories is None:
+            self._trajectories = self._df_to_trajectories(
+                self.points, self.traj_id_col, None, self.t, None, None, self.points.crs
+            )
+        return self._trajectories
+
+    @trajectories.setter
+    def trajectories(self, trajectories: list):
+        self._trajectories = trajectories
+
+    def __reduce__(self):
+        # pickled as a plain TrajectoryCollection, so reading it back needs neither the fixes table nor this module
+        state = {'min_length': self.min_length, 'min_duration': self.min_duration, 'trajectories': self.trajectories}
+        return object.__new__, (mpd.TrajectoryCollection,), state
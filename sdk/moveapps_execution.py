@@ -1,10 +1,36 @@
-import pandas as pd
+import glob
 import json
+import multiprocessing
 import os
 import logging
+import shutil
+import sys
+import time
 import pluggy
+from contextlib import contextmanager
 from dotenv import load_dotenv
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+PARQUET_EXTENSIONS = ('.parquet', '.geoparquet')
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+
+def file_format(path: str) -> str:
+    """
+    Detects the data format from the file extension: `parquet`, `arrow` or (default) `pickle`.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        return 'parquet'
+    if extension in ARROW_EXTENSIONS:
+        return 'arrow'
+    return 'pickle'
 
 
 @dataclass
@@ -12,6 +38,54 @@ class Environment:
     source_file: str
     output_file: str
     app_configuration: dict
+    source_columns: Optional[list] = None
+    track_id_column: str = 'trackId'
+    time_column: str = 'timestamp_tz'
+    pass_through: str = 'no'
+    log_verbosity: str = 'summary'
+
+
+@dataclass
+class Job:
+    source_file: str
+    output_file: str
+    app_configuration: dict = field(default_factory=dict)
+    artifacts_dir: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, entry: dict, artifacts_root: str) -> 'Job':
+        """
+        :param entry: `source`, `output` and optionally `config` and `artifacts_dir` of a job
+        :param artifacts_root: parent of the default artifacts directory, which is named after the output file
+        """
+        name = os.path.splitext(os.path.basename(entry['output']))[0]
+        return cls(
+            source_file=entry['source'],
+            output_file=entry['output'],
+            app_configuration=entry.get('config', {}),
+            artifacts_dir=entry.get('artifacts_dir') or os.path.join(artifacts_root, name)
+        )
+
+
+def load_manifest(path: str, artifacts_root: str) -> list:
+    """
+    Reads the jobs of a batch from a JSON list or a JSON lines file, see `Job.from_dict`.
+    """
+    with open(path) as file:
+        content = file.read().strip()
+    if content.startswith('['):
+        entries = json.loads(content)
+    else:
+        entries = [json.loads(line) for line in content.splitlines() if line.strip()]
+    return [Job.from_dict(entry, artifacts_root) for entry in entries]
+
+
+# executor of the batch; forked pool workers inherit it together with the imported modules and warm caches
+_batch_executor = None
+
+
+def _run_in_worker(job: Job) -> dict:
+    return _batch_executor.run_job(job)
 
 
 class MoveAppsExecutor:
@@ -20,18 +94,168 @@ class MoveAppsExecutor:
         load_dotenv()
         self._pm = plugin_manager
 
+    def run(self):
+        """
+        Runs a batch when `BATCH_MANIFEST` or `BATCH_SPOOL_DIR` is set, otherwise a single App run.
+        """
+        if os.environ.get('BATCH_MANIFEST'):
+            artifacts_root = os.environ.get('APP_ARTIFACTS_DIR', './resources/output')
+            self.execute_batch(load_manifest(os.environ['BATCH_MANIFEST'], artifacts_root))
+        elif os.environ.get('BATCH_SPOOL_DIR'):
+            idle_timeout = os.environ.get('BATCH_SPOOL_IDLE_TIMEOUT_S')
+            self.watch_spool(
+                os.environ['BATCH_SPOOL_DIR'],
+                poll_interval=float(os.environ.get('BATCH_SPOOL_POLL_S', '2')),
+                idle_timeout=float(idle_timeout) if idle_timeout else None
+            )
+        else:
+            self.execute()
+
+    @contextmanager
+    def __job_environment(self, job: Job):
+        variables = {
+            'SOURCE_FILE': job.source_file,
+            'OUTPUT_FILE': job.output_file,
+            'CONFIGURATION': json.dumps(job.app_configuration),
+            'APP_ARTIFACTS_DIR': job.artifacts_dir,
+        }
+        previous = {name: os.environ.get(name) for name in list(variables) + ['CONFIGURATION_FILE']}
+        os.environ.pop('CONFIGURATION_FILE', None)
+        os.environ.update({name: value for name, value in variables.items() if value is not None})
+        try:
+            yield
+        finally:
+            for name, value in previous.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+
+    def run_job(self, job: Job) -> dict:
+        """
+        Runs the App for one job of a batch with the job's input, output, configuration and artifacts directory.
+        A failing job is logged and reported, it does not stop the batch.
+
+        :return: `source`, `output`, `status` (`ok` or `failed`) and `seconds` of the job
+        """
+        started = time.perf_counter()
+        result = {'source': job.source_file, 'output': job.output_file}
+        if job.artifacts_dir:
+            os.makedirs(job.artifacts_dir, exist_ok=True)
+        with self.__job_environment(job):
+            try:
+                self.execute()
+                result['status'] = 'ok'
+            except Exception as error:
+                logging.exception(f'job for {job.source_file} failed')
+                result.update(status='failed', error=repr(error))
+        result['seconds'] = round(time.perf_counter() - started, 3)
+        return result
+
+    def execute_batch(self, jobs: list, workers: int = None, jobs_per_worker: int = None) -> list:
+        """
+        Runs many jobs in this process, keeping the App, the imported modules and warm caches (e.g. the CRS
+        transformers) across jobs. With more than one worker (`BATCH_WORKERS`) the jobs run in a pool of forked
+        processes; each worker is replaced after `jobs_per_worker` jobs (`BATCH_JOBS_PER_WORKER`) to bound its
+        memory.
+
+        :return: one result per job in the order of `jobs`, see `run_job`
+        """
+        global _batch_executor
+
+        self.__configure_logging()
+        workers = workers or int(os.environ.get('BATCH_WORKERS', '1'))
+        jobs_per_worker = jobs_per_worker or int(os.environ.get('BATCH_JOBS_PER_WORKER', '0')) or None
+        started = time.perf_counter()
+        if workers > 1 and len(jobs) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            _batch_executor = self
+            try:
+                with multiprocessing.get_context('fork').Pool(workers, maxtasksperchild=jobs_per_worker) as pool:
+                    results = pool.map(_run_in_worker, jobs, chunksize=1)
+            finally:
+                _batch_executor = None
+        else:
+            if workers > 1:
+                logging.warning('concurrent batch jobs need the fork start method, running them one by one')
+            results = [self.run_job(job) for job in jobs]
+        logging.info(json.dumps({
+            'event': 'batch_summary',
+            'jobs': len(results),
+            'failed': sum(result['status'] != 'ok' for result in results),
+            'workers': workers,
+            'seconds': round(time.perf_counter() - started, 3),
+        }))
+        return results
+
+    def watch_spool(self, directory: str, poll_interval: float = 2.0, idle_timeout: float = None) -> list:
+        """
+        Runs the jobs dropped as `*.json` files (one `Job.from_dict` entry each) into a spool directory. A job file
+        is claimed by renaming it to `*.json.running` and ends up as `*.json.done` or `*.json.failed`, with the
+        job result added. Jobs without `artifacts_dir` get a directory named after their output file next to it.
+
+        :param idle_timeout: stop after this many seconds without new jobs, None to watch forever
+        :return: the results of all jobs
+        """
+        self.__configure_logging()
+        results = []
+        idle_since = time.monotonic()
+        while True:
+            pending = sorted(glob.glob(os.path.join(directory, '*.json')))
+            if not pending:
+                if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                    return results
+                time.sleep(poll_interval)
+                continue
+            for path in pending:
+                running = f'{path}.running'
+                try:
+                    os.rename(path, running)
+                except OSError:
+                    # claimed by another watcher
+                    continue
+                try:
+                    with open(running) as file:
+                        entry = json.load(file)
+                    job = Job.from_dict(entry, os.path.join(directory, 'artifacts'))
+                except (ValueError, KeyError, TypeError) as error:
+                    logging.error(f'invalid job file {path}: {error!r}')
+                    os.rename(running, f'{path}.failed')
+                    continue
+                result = self.run_job(job)
+                results.append(result)
+                with open(running, 'w') as file:
+                    json.dump(dict(entry, result=result), file)
+                os.rename(running, f'{path}.{"done" if result["status"] == "ok" else "failed"}')
+            idle_since = time.monotonic()
+
     def execute(self):
         self.__configure_logging()
         self.__load_environment()
+        timings = {}
+        started = time.perf_counter()
         data = self.__load_input()
+        timings['load'] = time.perf_counter() - started
+
+        started = time.perf_counter()
         output = self.__call_app(data)
-        self.__store_output(output)
+        timings['app'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        if not (output is data and self.__pass_through()):
+            self.__store_output(output)
+        timings['store'] = time.perf_counter() - started
+        self.__log_summary(output, timings)
 
     def __load_environment(self):
         self.env = Environment(
             source_file=os.environ.get('SOURCE_FILE', 'resources/samples/input1.pickle'),
             output_file=os.environ.get('OUTPUT_FILE', 'resources/output/output.pickle'),
-            app_configuration=self.__load_config()
+            app_configuration=self.__load_config(),
+            source_columns=[c for c in os.environ.get('SOURCE_COLUMNS', '').split(',') if c] or None,
+            track_id_column=os.environ.get('TRACK_ID_COLUMN', 'trackId'),
+            time_column=os.environ.get('TIME_COLUMN', 'timestamp_tz'),
+            pass_through=os.environ.get('OUTPUT_PASS_THROUGH', 'no'),
+            log_verbosity=os.environ.get('LOG_VERBOSITY', 'summary')
         )
 
     @staticmethod
@@ -43,7 +267,29 @@ class MoveAppsExecutor:
         )
 
     def __load_input(self):
-        return pd.read_pickle(self.env.source_file)
+        source_format = file_format(self.env.source_file)
+        if source_format == 'pickle':
+            import pandas as pd
+
+            return pd.read_pickle(self.env.source_file)
+        return self.__load_columnar(source_format)
+
+    def __load_columnar(self, source_format: str):
+        """
+        Reads a GeoParquet or Arrow IPC file of fixes (memory-mapped, only the requested columns). The
+        TrajectoryCollection is built lazily from the columns, see `ColumnarTrajectoryCollection`: its Trajectory
+        objects, and so `traj.id`, come from grouping the fixes by the track ID column.
+        """
+        import geopandas as gpd
+        from sdk.moveapps_columnar import ColumnarTrajectoryCollection
+
+        columns = self.env.source_columns
+        if columns:
+            required = [self.env.track_id_column, self.env.time_column, 'geometry']
+            columns = list(dict.fromkeys(columns + required))
+        reader = gpd.read_parquet if source_format == 'parquet' else gpd.read_feather
+        points = reader(self.env.source_file, columns=columns, memory_map=True)
+        return ColumnarTrajectoryCollection(points, traj_id_col=self.env.track_id_column, t=self.env.time_column)
 
     @staticmethod
     def __load_config():
@@ -58,9 +304,110 @@ class MoveAppsExecutor:
         return parsed
 
     def __store_output(self, data):
-        logging.info(f'storing output: {data}')
-        pd.to_pickle(data, self.env.output_file)
+        import pandas as pd
+
+        logging.info(f'storing output to {self.env.output_file}')
+        output_format = file_format(self.env.output_file)
+        if output_format == 'pickle':
+            pd.to_pickle(data, self.env.output_file)
+            return
+        if getattr(data, 'loaded', True):
+            points = data.to_point_gdf()
+            points = points.rename_axis(points.index.name or self.env.time_column).reset_index()
+        else:
+            # a columnar input whose trajectories were never built is written from its table of fixes
+            points = data.points
+        if output_format == 'parquet':
+            points.to_parquet(self.env.output_file)
+        else:
+            points.to_feather(self.env.output_file)
+
+    def __pass_through(self) -> bool:
+        """
+        Provides the unchanged input as output by copying or hard-linking the source file instead of serializing
+        the data again. Only possible when input and output use the same format.
+
+        :return: whether the output was provided
+        """
+        mode = self.env.pass_through
+        if mode not in ('copy', 'link') or file_format(self.env.source_file) != file_format(self.env.output_file):
+            return False
+        if os.path.abspath(self.env.source_file) == os.path.abspath(self.env.output_file):
+            return True
+        if os.path.exists(self.env.output_file):
+            os.remove(self.env.output_file)
+        if mode == 'link':
+            try:
+                os.link(self.env.source_file, self.env.output_file)
+                logging.info(f'app did not change the data, linked {self.env.source_file} as output')
+                return True
+            except OSError:
+                pass
+        shutil.copyfile(self.env.source_file, self.env.output_file)
+        logging.info(f'app did not change the data, copied {self.env.source_file} as output')
+        return True
+
+    def __log_summary(self, data, timings: dict):
+        """
+        Logs one bounded JSON record about the run instead of the whole output data.
+        With `LOG_VERBOSITY=sample` the first rows of the first trajectory are included.
+        """
+        summary = {
+            'event': 'run_summary',
+            'output_file': self.env.output_file,
+            'bytes_written': os.path.getsize(self.env.output_file) if os.path.exists(self.env.output_file) else 0,
+            'timings_s': {phase: round(seconds, 3) for phase, seconds in timings.items()},
+        }
+        trajectories = None
+        if not getattr(data, 'loaded', True):
+            # counted on the table of fixes of a columnar input, without building its trajectories
+            points = data.points
+            summary['tracks'] = int(points[self.env.track_id_column].nunique())
+            summary['fixes'] = len(points)
+            if len(points):
+                times = points[self.env.time_column]
+                summary['start'], summary['end'] = str(times.min()), str(times.max())
+        elif getattr(data, 'trajectories', None) is not None:
+            trajectories = data.trajectories
+            summary['tracks'] = len(trajectories)
+            summary['fixes'] = sum(len(traj.df) for traj in trajectories)
+            if trajectories:
+                summary['start'] = str(min(traj.df.index[0] for traj in trajectories))
+                summary['end'] = str(max(traj.df.index[-1] for traj in trajectories))
+        else:
+            summary['output_type'] = type(data).__name__
+        if self.env.log_verbosity == 'sample' and trajectories:
+            summary['sample'] = trajectories[0].df.head(3).reset_index().astype(str).to_dict('records')
+        logging.info(json.dumps(summary))
 
     def __call_app(self, data):
-        outputs = self._pm.hook.execute(data=data, config=self.env.app_configuration)
+        undo = None
+        if os.environ.get('APP_PROFILE'):
+            undo = self._pm.add_hookcall_monitoring(self.__before_hook, self.__after_hook)
+        try:
+            outputs = self._pm.hook.execute(data=data, config=self.env.app_configuration)
+        finally:
+            if undo is not None:
+                undo()
         return outputs[0]
+
+    def __before_hook(self, hook_name, hook_impls, kwargs):
+        self._hook_started = (time.perf_counter(), time.process_time())
+
+    def __after_hook(self, outcome, hook_name, hook_impls, kwargs):
+        """
+        Logs wall time, CPU time and peak RSS of a hook call as one JSON record (enabled by `APP_PROFILE`).
+        """
+        wall, cpu = self._hook_started
+        record = {
+            'event': 'hook',
+            'hook': hook_name,
+            'plugins': [impl.plugin_name for impl in hook_impls],
+            'wall_s': round(time.perf_counter() - wall, 6),
+            'cpu_s': round(time.process_time() - cpu, 6),
+            'failed': outcome.excinfo is not None,
+        }
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            record['peak_rss_mb'] = peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+        logging.info(json.dumps(record))
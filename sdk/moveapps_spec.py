@@ -1,5 +1,11 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import pluggy
-from movingpandas import TrajectoryCollection
+
+if TYPE_CHECKING:
+    from movingpandas import TrajectoryCollection
 
 HOOK_NAMESPACE = "co-pilot-python"
 hook_spec = pluggy.HookspecMarker(HOOK_NAMESPACE)
@@ -164,3 +164,79 @@ class MyTestCase(unittest.TestCase):
             if got.empty and test.expect.empty:
                 continue
             assert_geodataframe_equal(got, test.expect, check_dtype=False)
+
+    def test_stops_gdf_empty_collection(self) -> None:
+        for config in [{"stop_duration": 2, "distance_tolerance": 1},
+                       {"stop_duration": 2, "distance_tolerance": 1, "workers": 2},
+                       {"stop_duration": 2, "distance_tolerance": 1, "stationarity_metric": 'final_radius',
+                        "max_window_fixes": 10}]:
+            # execute
+            got = self.sut.stops_gdf(mpd.TrajectoryCollection([]), config)
+
+            # verify
+            self.assertTrue(got.empty, f'{config}')
+
+    def test_stops_gdf_matches_track_id_column(self) -> None:
+        # prepare
+        # the trajectory IDs of input2 (e.g. 742) differ from their trackId column (e.g. 'X742')
+        data: mpd.TrajectoryCollection = pd.read_pickle(os.path.join(ROOT_DIR, 'tests/resources/app/input2.pickle'))
+        config = {"stop_duration": 1000, "distance_tolerance": 1e7}
+
+        # execute
+        got = self.sut.stops_gdf(data, config)
+
+        # verify
+        # every track is stopped, but like data.filter('trackId', ids) none of the trackIds is a trajectory ID
+        self.assertTrue(all(self.sut.stopped(traj, config) for traj in data))
+        self.assertEqual(0, len(got))
+
+    def test_write_clusters_stop_times_use_id_column(self) -> None:
+        # prepare
+        times = pd.date_range('2023-01-01', periods=3, freq='h', name='t')
+        traj = mpd.Trajectory(gpd.GeoDataFrame(
+            {'trackId': 'X742', 'geometry': [Point(31.5, -24.5)] * 3}, index=times, crs=4326
+        ), traj_id=742)
+        data = mpd.TrajectoryCollection([traj])
+
+        # execute
+        self.sut.write_clusters(data, data.get_end_locations(), {"cluster_radius": 100})
+
+        # verify
+        clusters = pd.read_csv(os.path.join(ROOT_DIR, 'tests/resources/output/stationary_clusters.csv'))
+        self.assertEqual(['X742'], clusters['trackIds'].tolist())
+        self.assertEqual(times[-1], pd.Timestamp(clusters['first_stop'][0]))
+        self.assertEqual(times[-1], pd.Timestamp(clusters['last_stop'][0]))
+
+    def test_plot_map_leaflet(self) -> None:
+        # prepare
+        points = gpd.GeoDataFrame(
+            {'trackId': ['a'], 'timestamps': [datetime(2023, 1, 1)], 'geometry': [Point(31.5, -24.25)]}, crs=4326
+        )
+
+        # execute
+        self.sut.plot_map(points, {"map_renderer": "leaflet"})
+
+        # verify
+        with open(os.path.join(ROOT_DIR, 'tests/resources/output/stationary.html')) as file:
+            html = file.read()
+        self.assertIn('"coordinates":[31.5,-24.25]', html)
+        self.assertIn('"trackId":"a"', html)
+        self.assertIn('map.fitBounds([[-25.25, 30.5], [-23.25, 32.5]]);', html)
+
+    def test_plot_map_offline(self) -> None:
+        # prepare
+        points = gpd.GeoDataFrame(
+            {'trackId': ['a', 'b'], 'timestamps': [datetime(2023, 1, 1)] * 2,
+             'geometry': [Point(31.5, -24.25), Point(31.75, -24.5)]}, crs=4326
+        )
+
+        # execute
+        self.sut.plot_map(points, {"map_renderer": "offline"})
+
+        # verify
+        with open(os.path.join(ROOT_DIR, 'tests/resources/output/stationary.html')) as file:
+            html = file.read()
+        self.assertEqual(2, html.count('<circle class="stop"'))
+        self.assertIn('trackId: a', html)
+        self.assertIn('<path class="land"', html)
+        self.assertNotIn('https://', html)
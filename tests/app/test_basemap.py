@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import geopandas as gpd
+import numpy as np
+from app import basemap, map_html
+from shapely.geometry import Point
+
+
+class TestBasemap(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.points = gpd.GeoDataFrame({'trackId': ['a<b'], 'geometry': [Point(31.5, -24.25)]}, crs=4326)
+
+    def create_mbtiles(self, zooms: list) -> str:
+        path = os.path.join(self.directory, 'tiles.mbtiles')
+        with sqlite3.connect(path) as connection:
+            connection.execute('CREATE TABLE metadata (name text, value text)')
+            connection.execute('CREATE TABLE tiles (zoom_level integer, tile_column integer, tile_row integer, '
+                               'tile_data blob)')
+            connection.executemany('INSERT INTO metadata VALUES (?, ?)', [('format', 'png'), ('attribution', 'OSM')])
+            for zoom in zooms:
+                for x in range(2 ** zoom):
+                    for y in range(2 ** zoom):
+                        connection.execute('INSERT INTO tiles VALUES (?, ?, ?, ?)',
+                                           (zoom, x, 2 ** zoom - 1 - y, f'{zoom}/{x}/{y}'.encode()))
+        return path
+
+    def test_mercator(self) -> None:
+        # execute
+        x, y = basemap.mercator([-180, 0, 180], [basemap.MAX_LATITUDE, 0, -basemap.MAX_LATITUDE])
+
+        # verify
+        np.testing.assert_allclose([0, 128, 256], x)
+        np.testing.assert_allclose([0, 128, 256], y, atol=1e-6)
+
+    def test_mbtiles_rows_are_flipped(self) -> None:
+        # prepare
+        source = basemap.MBTiles(self.create_mbtiles([0, 1]))
+
+        # execute
+        actual = source.tiles(1, range(0, 2), range(0, 1))
+
+        # verify
+        self.assertEqual({(0, 0): b'1/0/0', (1, 0): b'1/1/0'}, actual)
+        self.assertEqual([0, 1], source.zooms)
+        self.assertEqual('OSM', source.attribution)
+
+    def test_tile_layer_picks_most_detailed_zoom_within_limit(self) -> None:
+        # prepare
+        source = basemap.MBTiles(self.create_mbtiles([0, 1, 2, 3]))
+        x, y = basemap.mercator([31.5], [-24.25])
+        bounds = (x[0] - 1, y[0] - 1, x[0] + 1, y[0] + 1)
+
+        # execute
+        actual = basemap.tile_layer(source, bounds, width=256)
+
+        # verify
+        self.assertEqual(1, len(actual))
+        self.assertEqual(32.0, actual[0][2])
+        self.assertTrue(actual[0][3].startswith('data:image/png;base64,'))
+
+    def test_tile_directory(self) -> None:
+        # prepare
+        for x in range(2):
+            os.makedirs(os.path.join(self.directory, 'osm', '1', str(x)))
+            for y in range(2):
+                with open(os.path.join(self.directory, 'osm', '1', str(x), f'{y}.png'), 'wb') as file:
+                    file.write(b'tile')
+
+        # execute
+        source = basemap.tile_source(self.directory)
+
+        # verify
+        self.assertIsInstance(source, basemap.TileDirectory)
+        self.assertEqual(4, len(basemap.tile_layer(source, (0, 0, 256, 256), width=512)))
+
+    def test_save_offline_embeds_tiles(self) -> None:
+        # prepare
+        self.create_mbtiles([0, 1])
+        path = os.path.join(self.directory, 'stationary.html')
+
+        # execute
+        map_html.save_offline(self.points, path, self.directory)
+
+        # verify
+        with open(path) as file:
+            html = file.read()
+        self.assertIn('<image ', html)
+        self.assertNotIn('<path class="land"', html)
+        self.assertIn('trackId: a&lt;b', html)
+        self.assertNotIn('https://', html)
+
+    def test_save_offline_without_basemap(self) -> None:
+        # prepare
+        path = os.path.join(self.directory, 'stationary.html')
+
+        # execute
+        map_html.save_offline(self.points, path, None)
+
+        # verify
+        with open(path) as file:
+            html = file.read()
+        self.assertIn('<circle class="stop"', html)
+        self.assertNotIn('<image ', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from datetime import datetime
+
+import numpy as np
+from app.clustering import cluster_labels, cluster_summary
+from app.distance import haversine
+
+
+class TestClustering(unittest.TestCase):
+
+    def test_matches_pairwise_single_linkage(self) -> None:
+        # prepare
+        rng = np.random.default_rng(1)
+        lon = np.r_[rng.uniform(-180, 180, 100), 31 + rng.normal(0, 0.01, 50), 179.999 + rng.normal(0, 0.002, 50)]
+        lat = np.r_[rng.uniform(-89, 89, 100), -24 + rng.normal(0, 0.01, 50), 60 + rng.normal(0, 0.002, 50)]
+        lon = (lon + 180) % 360 - 180
+        adjacent = haversine(lon[:, None], lat[:, None], lon[None, :], lat[None, :]) <= 500
+        expected = -np.ones(len(lon), dtype=int)
+        for start in range(len(lon)):
+            if expected[start] < 0:
+                expected[start] = start
+                stack = [start]
+                while stack:
+                    for other in np.flatnonzero(adjacent[stack.pop()] & (expected < 0)):
+                        expected[other] = start
+                        stack.append(other)
+
+        # execute
+        actual = cluster_labels(lon, lat, 500)
+
+        # verify
+        self.assertEqual(len(set(expected)), len(set(actual)))
+        self.assertEqual(len(set(expected)), len(set(zip(expected, actual))))
+
+    def test_summary(self) -> None:
+        # execute
+        summary = cluster_summary(
+            [10.0, 10.001, 20.0], [50.0, 50.0, 50.0], ['a', 'b', 'c'],
+            [datetime(2023, 1, 2), datetime(2023, 1, 1), datetime(2023, 1, 3)], 100
+        )
+
+        # verify
+        self.assertEqual([2, 1], summary['size'].tolist())
+        self.assertEqual(['a;b', 'c'], summary['trackIds'].tolist())
+        self.assertAlmostEqual(10.0005, summary['lon'][0])
+        self.assertAlmostEqual(50.0, summary['lat'][0], places=6)
+        self.assertEqual(datetime(2023, 1, 1), summary['first_stop'][0])
+        self.assertEqual(datetime(2023, 1, 2), summary['last_stop'][0])
@@ -0,0 +1,57 @@
+import unittest
+import warnings
+
+from app import distance
+
+
+class TestDistance(unittest.TestCase):
+
+    def test_methods_agree_near_equator(self) -> None:
+        # prepare
+        args = ([0.0, 10.0], [0.0, 1.0], [0.001, 10.0], [0.0, 1.001], 'EPSG:4326')
+
+        # execute
+        haversine = distance.distances(*args, method='haversine')
+        geodesic = distance.distances(*args, method='geodesic')
+
+        # verify
+        for expected, actual in zip([111.2, 111.2], haversine):
+            self.assertAlmostEqual(expected, actual, places=0)
+        for expected, actual in zip(haversine, geodesic):
+            self.assertLess(abs(expected - actual) / expected, 0.01)
+
+    def test_geodesic_undistorted_at_high_latitude(self) -> None:
+        # execute
+        robinson = distance.distances(20.0, 78.0, 20.01, 78.0, 'EPSG:4326', method='robinson')
+        geodesic = distance.distances(20.0, 78.0, 20.01, 78.0, 'EPSG:4326', method='geodesic')
+
+        # verify
+        self.assertAlmostEqual(232.2, geodesic[0], places=1)
+        self.assertGreater(abs(robinson[0] - geodesic[0]) / geodesic[0], 0.04)
+
+    def test_projected_input_is_converted_to_lonlat(self) -> None:
+        # execute
+        actual = distance.distances(0.0, 0.0, 1000.0, 0.0, 'EPSG:3857', method='haversine')
+
+        # verify
+        self.assertAlmostEqual(1000.0, actual[0], delta=5)
+
+    def test_single_pair_matches_bulk(self) -> None:
+        # prepare
+        args = ([20.0, 0.0], [78.0, 0.0], [20.01, 1000.0], [78.0, 0.0])
+
+        for method in ['robinson', 'haversine', 'geodesic']:
+            for crs in ['EPSG:4326', 'EPSG:3857']:
+                # execute
+                with warnings.catch_warnings():
+                    warnings.simplefilter('error', DeprecationWarning)
+                    single = distance.distances(*(value[0] for value in args), crs, method=method)
+                bulk = distance.distances(*args, crs, method=method)
+
+                # verify
+                self.assertEqual((1,), single.shape)
+                self.assertAlmostEqual(bulk[0], single[0], msg=f'{method} {crs}')
+
+    def test_unknown_method(self) -> None:
+        with self.assertRaises(ValueError):
+            distance.distances(0, 0, 1, 1, 'EPSG:4326', method='manhattan')
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+import movingpandas as mpd
+import pandas as pd
+from app import incremental
+from app.stationarity import stationary_track_ids
+from tests.config.definitions import ROOT_DIR
+
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.data: mpd.TrajectoryCollection = pd.read_pickle(
+            os.path.join(ROOT_DIR, 'tests/resources/app/rhino_edited.pickle')
+        )
+        self.state_path = os.path.join(tempfile.mkdtemp(), incremental.STATE_FILE)
+
+    def history(self, fraction: float) -> mpd.TrajectoryCollection:
+        return mpd.TrajectoryCollection([
+            mpd.Trajectory(traj.df.iloc[:max(2, int(len(traj.df) * fraction))], traj.id) for traj in self.data
+        ])
+
+    def test_follow_up_run_matches_full_run(self) -> None:
+        for stop_duration in [1, 10, 48]:
+            for distance_tolerance in [10, 100, 10000]:
+                # prepare
+                if os.path.exists(self.state_path):
+                    os.remove(self.state_path)
+                config = {"stop_duration": stop_duration, "distance_tolerance": distance_tolerance}
+                incremental.stationary_track_ids(self.history(0.6), config, self.state_path)
+
+                # execute
+                actual = incremental.stationary_track_ids(self.data, config, self.state_path)
+
+                # verify
+                self.assertEqual(stationary_track_ids(self.data, config), actual, f'{config}')
+
+    def test_state_only_keeps_trailing_windows(self) -> None:
+        # prepare
+        config = {"stop_duration": 10, "distance_tolerance": 100}
+
+        # execute
+        incremental.stationary_track_ids(self.data, config, self.state_path)
+
+        # verify
+        state = incremental.load_state(self.state_path, config)
+        self.assertEqual({traj.id for traj in self.data}, set(state))
+        self.assertLess(sum(len(track[1]) for track in state.values()), sum(len(traj.df) for traj in self.data))
+        self.assertEqual({}, incremental.load_state(self.state_path, dict(config, stop_duration=11)))
@@ -0,0 +1,206 @@
+import itertools
+import math
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from app import metrics, window
+from app.stationarity import stationary_track_ids, window_spread
+from benchmarks.synthetic import Scenario, collection
+
+
+def brute_force_circle(east: np.ndarray, north: np.ndarray) -> float:
+    points = np.column_stack([east, north])
+    best = np.inf
+    candidates = [metrics._circle([tuple(p)]) for p in points]
+    candidates += [metrics._circle([tuple(p), tuple(q)]) for p, q in itertools.combinations(points, 2)]
+    candidates += [metrics._circle([tuple(p), tuple(q), tuple(r)]) for p, q, r in itertools.combinations(points, 3)]
+    for cx, cy, radius in candidates:
+        if np.all(np.hypot(points[:, 0] - cx, points[:, 1] - cy) <= radius * (1 + 1e-9) + 1e-6):
+            best = min(best, radius)
+    return best
+
+
+def brute_force_spread(traj, config: dict) -> float:
+    """
+    Spread of the trailing window of a lon/lat trajectory, one fix at a time with the metric definitions.
+    """
+    end = traj.get_end_time()
+    segment = traj.get_segment_between(end - timedelta(hours=config["stop_duration"]), end).df.geometry
+    lon0, lat0 = math.radians(segment.x.iloc[-1]), math.radians(segment.y.iloc[-1])
+    radii, east, north = [], [], []
+    for point in segment:
+        lon, lat = math.radians(point.x), math.radians(point.y)
+        a = math.sin((lat - lat0) / 2) ** 2 + math.cos(lat0) * math.cos(lat) * math.sin((lon - lon0) / 2) ** 2
+        radii.append(2 * metrics.EARTH_RADIUS * math.asin(math.sqrt(a)))
+        east.append(metrics.EARTH_RADIUS * math.cos(lat0) * (lon - lon0))
+        north.append(metrics.EARTH_RADIUS * (lat - lat0))
+    if config["stationarity_metric"] == 'final_radius':
+        return max(radii)
+    if config["stationarity_metric"] == 'percentile_radius':
+        return float(np.percentile(radii, 90))
+    return brute_force_circle(np.array(east), np.array(north))
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(1)
+        lengths = rng.integers(2, 12, size=40)
+        self.starts = np.r_[0, np.cumsum(lengths)[:-1]]
+        self.stops = np.cumsum(lengths)
+        self.x = 31.5 + rng.normal(0, 0.001, size=lengths.sum())
+        self.y = -24.0 + rng.normal(0, 0.001, size=lengths.sum())
+
+    def test_final_radius(self) -> None:
+        # execute
+        actual = metrics.final_radius(self.x, self.y, self.starts, self.stops, 'EPSG:4326', 'haversine')
+
+        # verify
+        for window, (start, stop) in enumerate(zip(self.starts, self.stops)):
+            expected = metrics.distance.haversine(self.x[start:stop], self.y[start:stop],
+                                                  self.x[stop - 1], self.y[stop - 1]).max()
+            self.assertAlmostEqual(expected, actual[window])
+
+    def test_percentile_radius_matches_numpy(self) -> None:
+        for percentile in [0, 50, 90, 100]:
+            # execute
+            actual = metrics.percentile_radius(self.x, self.y, self.starts, self.stops, 'EPSG:4326', 'haversine',
+                                               percentile)
+
+            # verify
+            for window, (start, stop) in enumerate(zip(self.starts, self.stops)):
+                distances = metrics.distance.haversine(self.x[start:stop], self.y[start:stop],
+                                                       self.x[stop - 1], self.y[stop - 1])
+                self.assertAlmostEqual(np.percentile(distances, percentile), actual[window], msg=f'{percentile}')
+
+    def test_enclosing_circle_is_exact(self) -> None:
+        # prepare
+        east, north, offsets = metrics.local_plane(self.x, self.y, self.starts, self.stops, 'EPSG:4326')
+
+        # execute
+        actual = metrics.enclosing_circle(self.x, self.y, self.starts, self.stops, 'EPSG:4326')
+
+        # verify
+        for window in range(len(self.starts)):
+            begin, end = offsets[window], offsets[window + 1]
+            self.assertAlmostEqual(brute_force_circle(east[begin:end], north[begin:end]), actual[window], places=4)
+
+    def test_enclosing_circle_decisions_match_exact_radius(self) -> None:
+        # prepare
+        exact = metrics.enclosing_circle(self.x, self.y, self.starts, self.stops, 'EPSG:4326')
+        tolerances = np.quantile(exact, [0.25, 0.5, 0.75])
+
+        # execute
+        actual = metrics.enclosing_circle(self.x, self.y, self.starts, self.stops, 'EPSG:4326', tolerances)
+
+        # verify
+        for tolerance in tolerances:
+            np.testing.assert_array_equal(exact <= tolerance, actual <= tolerance)
+
+    def test_approximate_bounds_enclose_exact_radius(self) -> None:
+        # prepare
+        east, north, offsets = metrics.local_plane(self.x, self.y, self.starts, self.stops, 'EPSG:4326')
+        exact = metrics.enclosing_circle(self.x, self.y, self.starts, self.stops, 'EPSG:4326')
+
+        # execute
+        lower, upper = metrics.approximate_circles(east, north, offsets)
+
+        # verify
+        self.assertTrue(np.all(lower <= exact + 1e-6))
+        self.assertTrue(np.all(exact <= upper + 1e-6))
+
+    def test_scanned_metric_decisions_match_full_window(self) -> None:
+        for metric in metrics.MONOTONE_METRICS:
+            # prepare
+            full = metrics.window_metric(self.x, self.y, self.starts, self.stops, 'EPSG:4326', metric, 'haversine')
+            tolerances = np.quantile(full, [0.25, 0.5, 0.75])
+
+            # execute
+            actual = metrics.scanned_metric(self.x, self.y, self.starts, self.stops, 'EPSG:4326', metric,
+                                            tolerances, 'haversine', block=2)
+
+            # verify
+            for tolerance in tolerances:
+                np.testing.assert_array_equal(full <= tolerance, actual <= tolerance, metric)
+
+    def test_unknown_metric(self) -> None:
+        with self.assertRaises(ValueError):
+            metrics.window_metric(self.x, self.y, self.starts, self.stops, 'EPSG:4326', 'convex_hull')
+
+    def test_percentile_radius_ignores_outlier(self) -> None:
+        # prepare
+        t = window.timestamps_ns(pd.date_range('2023-01-01', periods=20, freq='h'))
+        x = np.full(20, 31.5) + np.linspace(0, 1e-5, 20)
+        x[10] += 0.05
+        y = np.full(20, -24.0)
+
+        # execute
+        spreads = {metric: window_spread(t, x, y, np.array([0, 20]), 24, 'EPSG:4326', 'haversine', metric, 90,
+                                         [100])[0]
+                   for metric in metrics.METRICS}
+
+        # verify
+        self.assertGreater(spreads['bbox'], 100)
+        self.assertGreater(spreads['final_radius'], 100)
+        self.assertGreater(spreads['enclosing_circle'], 100)
+        self.assertLess(spreads['percentile_radius'], 100)
+
+    def test_collection_matches_brute_force(self) -> None:
+        # prepare
+        data = collection(Scenario(tracks=30, fixes=60, stationary_fraction=0.5, seed=3))
+        for metric in metrics.METRICS[1:]:
+            config = {"stop_duration": 12, "distance_tolerance": 30, "distance_method": 'haversine',
+                      "stationarity_metric": metric}
+
+            # execute
+            actual = stationary_track_ids(data, config)
+
+            # verify
+            self.assertTrue(actual, metric)
+            expected = [traj.id for traj in data if brute_force_spread(traj, config) <= config["distance_tolerance"]]
+            self.assertEqual(expected, actual, metric)
+
+    def test_scan_stops_early_for_moving_track(self) -> None:
+        # prepare
+        # one fix per second over the whole 24 hour window: a moving and a stationary track
+        n = 20000
+        t = np.tile(window.timestamps_ns(pd.date_range('2023-01-01', periods=n, freq='s')), 2)
+        x = np.r_[31.5 + np.arange(n) * 1e-4, np.full(n, 31.5) + np.arange(n) * 1e-10]
+        y = np.full(2 * n, -24.0)
+        offsets = np.array([0, n, 2 * n])
+        expected = window_spread(t, x, y, offsets, 24, 'EPSG:4326', 'haversine', 'final_radius')
+
+        # execute
+        with mock.patch('app.metrics.window_metric', wraps=metrics.window_metric) as window_metric:
+            actual = window_spread(t, x, y, offsets, 24, 'EPSG:4326', 'haversine', 'final_radius', tolerances=[100])
+
+        # verify
+        self.assertEqual([False, True], (actual <= 100).tolist())
+        np.testing.assert_array_equal(expected <= 100, actual <= 100)
+        scanned = [(call.args[3], call.args[2]) for call in window_metric.call_args_list]
+        np.testing.assert_array_equal([metrics.SCAN_BLOCK] * 2, scanned[0][0] - scanned[0][1])
+        # the moving track is decided by its final block, only the stationary one is scanned further
+        self.assertTrue(all(len(stops) == 1 for stops, _ in scanned[1:]))
+        self.assertEqual(n, scanned[-1][0][0] - scanned[-1][1][0])
+
+    def test_thinning_caps_fixes_per_window(self) -> None:
+        # prepare
+        t = window.timestamps_ns(pd.date_range('2023-01-01', periods=1000, freq='min'))
+        x = 31.5 + np.arange(1000) * 1e-6
+
+        # execute
+        with mock.patch('app.metrics.window_metric', wraps=metrics.window_metric) as window_metric:
+            window_spread(t, x, np.full(1000, -24.0), np.array([0, 1000]), 24, 'EPSG:4326', 'haversine',
+                          'percentile_radius', max_fixes=100)
+
+        # verify
+        thinned, _, starts, stops = window_metric.call_args.args[:4]
+        self.assertEqual([100], (stops - starts).tolist())
+        self.assertEqual(x[-1], thinned[stops[0] - 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import pstats
+import time
+import unittest
+from unittest import mock
+
+from app.profiling import Profiler
+from sdk.moveapps_io import MoveAppsIo
+from tests.config.definitions import ROOT_DIR
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        os.environ['APP_ARTIFACTS_DIR'] = os.path.join(ROOT_DIR, 'tests/resources/output')
+        self.io = MoveAppsIo()
+
+    def test_disabled_without_environment(self) -> None:
+        # prepare
+        with mock.patch.dict(os.environ, {'APP_PROFILE': ''}):
+            sut = Profiler.from_environment(self.io)
+
+        # execute
+        with sut, sut.span('nothing'):
+            pass
+
+        # verify
+        self.assertFalse(sut.enabled)
+        self.assertEqual([], sut.spans)
+
+    def test_spans_and_artifacts(self) -> None:
+        # prepare
+        with mock.patch.dict(os.environ, {'APP_PROFILE': 'spans,pstats,collapsed'}):
+            sut = Profiler.from_environment(self.io)
+
+        # execute
+        with self.assertLogs(level='INFO'), sut:
+            with sut.span('busy'):
+                deadline = time.perf_counter() + 0.05
+                while time.perf_counter() < deadline:
+                    pass
+
+        # verify
+        self.assertEqual(['busy'], [span['name'] for span in sut.spans])
+        self.assertGreaterEqual(sut.spans[0]['wall_s'], 0.05)
+        self.assertGreater(sut.spans[0]['cpu_s'], 0)
+        stats = pstats.Stats(self.io.create_artifacts_file('profile.pstats'))
+        self.assertGreater(stats.total_calls, 0)
+        with open(self.io.create_artifacts_file('profile.collapsed')) as file:
+            self.assertIn('test_spans_and_artifacts', file.read())
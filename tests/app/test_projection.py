@@ -0,0 +1,54 @@
+import unittest
+import warnings
+
+import numpy as np
+from app.projection import TransformerCache
+
+
+class TestTransformerCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.sut = TransformerCache(maxsize=2)
+
+    def test_transformer_is_reused(self) -> None:
+        # execute
+        first = self.sut.get('EPSG:4326', 'ESRI:54031')
+        second = self.sut.get('EPSG:4326', 'ESRI:54031')
+
+        # verify
+        self.assertIs(first, second)
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 2}, self.sut.info())
+
+    def test_least_recently_used_is_evicted(self) -> None:
+        # prepare
+        self.sut.get('EPSG:4326', 'ESRI:54031')
+        self.sut.get('EPSG:4326', 'EPSG:3857')
+        self.sut.get('EPSG:4326', 'ESRI:54031')
+
+        # execute
+        self.sut.get('EPSG:4326', 'EPSG:32633')
+        self.sut.get('EPSG:4326', 'ESRI:54031')
+
+        # verify
+        self.assertEqual(2, self.sut.hits)
+        self.assertEqual(3, self.sut.misses)
+
+    def test_bulk_transform(self) -> None:
+        # execute
+        xs, ys = self.sut.transform([0, 10], [0, 0], 'EPSG:4326', 'EPSG:3857')
+
+        # verify
+        self.assertAlmostEqual(0, xs[0])
+        self.assertAlmostEqual(1113194.9, xs[1], places=0)
+        self.assertEqual((2,), ys.shape)
+
+    def test_single_point_transform(self) -> None:
+        # execute
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            xs, ys = self.sut.transform(np.array([10.0]), np.array([0.0]), 'EPSG:4326', 'EPSG:3857')
+
+        # verify
+        self.assertEqual((1,), xs.shape)
+        self.assertAlmostEqual(1113194.9, xs[0], places=0)
+        self.assertAlmostEqual(0, ys[0])
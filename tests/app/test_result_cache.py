@@ -0,0 +1,143 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import movingpandas as mpd
+import pandas as pd
+from app.app import App
+from app.result_cache import ResultCache
+from sdk.moveapps_io import MoveAppsIo
+from tests.config.definitions import ROOT_DIR
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResultCache(os.path.join(self.directory, 'cache'))
+        self.source_file = os.path.join(self.directory, 'input.pickle')
+        shutil.copyfile(os.path.join(ROOT_DIR, 'tests/resources/app/input2.pickle'), self.source_file)
+        self.artifacts_dir = os.path.join(self.directory, 'artifacts')
+        os.makedirs(self.artifacts_dir)
+        os.environ['APP_ARTIFACTS_DIR'] = self.artifacts_dir
+
+    def tearDown(self) -> None:
+        os.environ['APP_ARTIFACTS_DIR'] = os.path.join(ROOT_DIR, 'tests/resources/output')
+        shutil.rmtree(self.directory)
+
+    def test_fingerprint_reuses_digest_of_unchanged_file(self) -> None:
+        # prepare
+        expected = self.cache.fingerprint(self.source_file)
+
+        # execute
+        with mock.patch('hashlib.blake2b') as blake2b:
+            actual = self.cache.fingerprint(self.source_file)
+
+        # verify
+        self.assertEqual(expected, actual)
+        blake2b.assert_not_called()
+
+    def test_fingerprint_changes_with_content(self) -> None:
+        # prepare
+        before = self.cache.fingerprint(self.source_file)
+
+        # execute
+        with open(self.source_file, 'ab') as file:
+            file.write(b'more')
+        after = self.cache.fingerprint(self.source_file)
+
+        # verify
+        self.assertNotEqual(before, after)
+
+    def test_unreadable_index_is_treated_as_empty(self) -> None:
+        # prepare
+        expected = self.cache.fingerprint(self.source_file)
+        with open(os.path.join(self.cache.directory, 'fingerprints.json'), 'w') as file:
+            file.write('{"/half/written": {"si')
+
+        # execute
+        actual = self.cache.fingerprint(self.source_file)
+
+        # verify
+        self.assertEqual(expected, actual)
+        self.assertEqual([os.path.abspath(self.source_file)], list(self.cache._read_index()))
+        self.assertEqual([], [name for name in os.listdir(self.cache.directory) if name.endswith('.tmp')])
+
+    def test_key_depends_on_config_but_not_workers(self) -> None:
+        # prepare
+        config = {"stop_duration": 15, "distance_tolerance": 100}
+
+        # execute
+        key = self.cache.key(self.source_file, config)
+
+        # verify
+        self.assertEqual(key, self.cache.key(self.source_file, {**config, "workers": 4}))
+        self.assertNotEqual(key, self.cache.key(self.source_file, {**config, "distance_tolerance": 10}))
+
+    def test_evicts_least_recently_used_entries(self) -> None:
+        # prepare
+        moveapps_io = MoveAppsIo()
+        with open(moveapps_io.create_artifacts_file('stationary.csv'), 'w') as file:
+            file.write('x' * 1000)
+        self.cache.max_bytes = 2500
+        for key in ['a', 'b']:
+            self.cache.store(key, moveapps_io, ['stationary.csv'])
+            os.utime(os.path.join(self.cache.directory, key, 'manifest.json'), (0, 0))
+        self.assertTrue(self.cache.restore('a', moveapps_io))
+
+        # execute
+        self.cache.store('c', moveapps_io, ['stationary.csv'])
+
+        # verify
+        self.assertEqual(['a', 'c'], sorted(name for name in os.listdir(self.cache.directory) if len(name) == 1))
+
+    def test_eviction_prunes_fingerprint_index(self) -> None:
+        # prepare
+        moveapps_io = MoveAppsIo()
+        with open(moveapps_io.create_artifacts_file('stationary.csv'), 'w') as file:
+            file.write('x' * 1000)
+        other_file = os.path.join(self.directory, 'other.pickle')
+        shutil.copyfile(self.source_file, other_file)
+        with open(other_file, 'ab') as file:
+            file.write(b'other')
+        self.cache.max_bytes = 1500
+        first = self.cache.key(self.source_file, {"stop_duration": 1})
+        self.cache.store(first, moveapps_io, ['stationary.csv'])
+        os.utime(os.path.join(self.cache.directory, first, 'manifest.json'), (0, 0))
+
+        # execute
+        self.cache.store(self.cache.key(other_file, {"stop_duration": 1}), moveapps_io, ['stationary.csv'])
+
+        # verify
+        self.assertFalse(os.path.exists(os.path.join(self.cache.directory, first)))
+        self.assertEqual([os.path.abspath(other_file)], list(self.cache._read_index()))
+
+    def test_app_restores_artifacts_on_hit(self) -> None:
+        # prepare
+        data: mpd.TrajectoryCollection = pd.read_pickle(self.source_file)
+        config = {"stop_duration": 15, "distance_tolerance": 100}
+        environment = {'APP_RESULT_CACHE_DIR': self.cache.directory, 'SOURCE_FILE': self.source_file}
+        app = App(moveapps_io=MoveAppsIo())
+        with mock.patch.dict(os.environ, environment):
+            app.execute(data=data, config=config)
+        with open(os.path.join(self.artifacts_dir, 'stationary.csv')) as file:
+            expected = file.read()
+        shutil.rmtree(self.artifacts_dir)
+        os.makedirs(self.artifacts_dir)
+
+        # execute
+        with mock.patch.dict(os.environ, environment), \
+                mock.patch.object(App, 'end_locations', side_effect=AssertionError('recomputed')):
+            actual = app.execute(data=data, config=config)
+
+        # verify
+        self.assertEqual(data, actual)
+        with open(os.path.join(self.artifacts_dir, 'stationary.csv')) as file:
+            self.assertEqual(expected, file.read())
+        self.assertEqual(sorted(app.artifacts), sorted(os.listdir(self.artifacts_dir)))
+
+
+if __name__ == '__main__':
+    unittest.main()
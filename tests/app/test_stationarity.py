@@ -0,0 +1,86 @@
+import math
+import os
+import unittest
+from datetime import datetime, timedelta
+
+import geopandas as gpd
+import movingpandas as mpd
+import pandas as pd
+from app.stationarity import stationary_track_ids
+from pyproj import Geod
+from shapely.geometry import LineString, Point
+from tests.config.definitions import ROOT_DIR
+
+
+def baseline_stopped(traj: mpd.Trajectory, config: dict) -> bool:
+    """
+    Per-trajectory determination as the app made it before batching: the diagonal of the bounding box of the trailing
+    window, measured with the configured method.
+    """
+    end = traj.get_end_time()
+    try:
+        segment = traj.get_segment_between(end - timedelta(hours=config["stop_duration"]), end)
+    except ValueError:
+        return False
+    bb = segment.get_bbox()
+    if config["distance_method"] == 'robinson':
+        extremes = gpd.GeoSeries(LineString(((bb[0], bb[1]), (bb[2], bb[3]))), crs=traj.crs).to_crs("ESRI:54031")
+        length = extremes.length[0]
+    elif config["distance_method"] == 'haversine':
+        lon1, lat1, lon2, lat2 = (math.radians(value) for value in bb)
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        length = 2 * 6371008.8 * math.asin(math.sqrt(a))
+    else:
+        _, _, length = Geod(ellps='WGS84').inv(bb[0], bb[1], bb[2], bb[3])
+    return length <= config["distance_tolerance"]
+
+
+class TestStationarity(unittest.TestCase):
+
+    def test_matches_per_track_stopped(self) -> None:
+        # prepare
+        data: mpd.TrajectoryCollection = pd.read_pickle(
+            os.path.join(ROOT_DIR, 'tests/resources/app/rhino_edited.pickle')
+        )
+
+        for stop_duration in [1, 10, 48]:
+            for distance_tolerance in [1, 100, 10000]:
+                for distance_method in ['robinson', 'haversine', 'geodesic']:
+                    config = {"stop_duration": stop_duration, "distance_tolerance": distance_tolerance,
+                              "distance_method": distance_method}
+                    expected = [traj.id for traj in data if baseline_stopped(traj, config)]
+
+                    # execute
+                    actual = stationary_track_ids(data, config)
+
+                    # verify
+                    self.assertEqual(expected, actual, f'{config}')
+
+    def test_fewer_than_two_entries_in_window(self) -> None:
+        # prepare
+        traj = mpd.Trajectory(gpd.GeoDataFrame(pd.DataFrame([
+            {'trackId': 1, 'geometry': Point(2, 2), 't': datetime(2023, 1, 1, 1, 0, 0)},
+            {'trackId': 1, 'geometry': Point(2, 2), 't': datetime(2023, 1, 1, 9, 0, 0)},
+        ]).set_index('t'), crs=4326), traj_id=1)
+        config = {"stop_duration": 2, "distance_tolerance": 1000}
+
+        # execute
+        with self.assertLogs(level='ERROR'):
+            actual = stationary_track_ids(mpd.TrajectoryCollection([traj]), config)
+
+        # verify
+        self.assertEqual([], actual)
+
+    def test_parallel_matches_serial(self) -> None:
+        # prepare
+        data: mpd.TrajectoryCollection = pd.read_pickle(
+            os.path.join(ROOT_DIR, 'tests/resources/app/rhino_edited.pickle')
+        )
+        config = {"stop_duration": 10, "distance_tolerance": 100}
+        expected = stationary_track_ids(data, config)
+
+        # execute
+        actual = stationary_track_ids(data, dict(config, workers=2))
+
+        # verify
+        self.assertEqual(expected, actual)
@@ -0,0 +1,125 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+import geopandas as gpd
+import movingpandas as mpd
+import pandas as pd
+from app import stops_writer
+from app.app import App
+from app.track_store import TrackStore
+from sdk.moveapps_io import MoveAppsIo
+from shapely.geometry import Point
+from tests.config.definitions import ROOT_DIR
+
+
+class TestStopsWriter(unittest.TestCase):
+
+    def setUp(self) -> None:
+        os.environ['APP_ARTIFACTS_DIR'] = os.path.join(ROOT_DIR, 'tests/resources/output')
+        self.directory = tempfile.mkdtemp()
+        self.stops = gpd.GeoDataFrame({
+            'trackId': ['a', 'b', 'c'],
+            'timestamps': pd.to_datetime(['2023-01-01 01:00', '2023-01-02 02:00', '2023-01-03 03:00']),
+            'sensor': ['gps'] * 3,
+            'geometry': [Point(31.123456789, -24.5), Point(32.0, -25.25), Point(-0.000001, 51.5)],
+        }, crs='epsg:4326')
+
+    def test_default_columns(self) -> None:
+        # prepare
+        path = os.path.join(self.directory, 'stationary.csv')
+
+        # execute
+        rows = stops_writer.write_csv(stops_writer.stop_columns(self.stops, stops_writer.parse_columns(None)), path)
+
+        # verify
+        self.assertEqual(3, rows)
+        actual = pd.read_csv(path)
+        self.assertEqual(['trackId', 'timestamp', 'lon', 'lat'], list(actual.columns))
+        self.assertEqual(list(self.stops.geometry.x), list(actual['lon']))
+        self.assertEqual(list(self.stops.geometry.y), list(actual['lat']))
+        self.assertEqual(list(self.stops['timestamps']), list(pd.to_datetime(actual['timestamp'])))
+
+    def test_chunks_match_single_write(self) -> None:
+        # prepare
+        arrays = stops_writer.stop_columns(self.stops, stops_writer.parse_columns('trackId, sensor,lat'))
+        single, chunked = os.path.join(self.directory, 'single.csv'), os.path.join(self.directory, 'chunked.csv')
+
+        # execute
+        stops_writer.write_csv(arrays, single)
+        stops_writer.write_csv(arrays, chunked, chunk_size=2)
+
+        # verify
+        with open(single) as expected, open(chunked) as actual:
+            self.assertEqual(expected.read(), actual.read())
+
+    def test_gzip_and_parquet_exports(self) -> None:
+        # prepare
+        arrays = stops_writer.stop_columns(self.stops, list(stops_writer.DEFAULT_COLUMNS))
+        csv, gz, parquet = (os.path.join(self.directory, f'stationary{suffix}')
+                            for suffix in ['.csv', '.csv.gz', '.parquet'])
+        stops_writer.write_csv(arrays, csv)
+
+        # execute
+        stops_writer.write_csv(arrays, gz, 'gzip', chunk_size=2)
+        stops_writer.write_parquet(arrays, parquet, chunk_size=2)
+
+        # verify
+        with open(csv) as expected, gzip.open(gz, 'rt') as actual:
+            self.assertEqual(expected.read(), actual.read())
+        actual = pd.read_parquet(parquet)
+        self.assertEqual(['a', 'b', 'c'], list(actual['trackId']))
+        self.assertEqual(list(self.stops.geometry.x), list(actual['lon']))
+
+    def test_end_times_when_there_is_no_timestamps_column(self) -> None:
+        # prepare
+        stops = self.stops.drop(columns='timestamps')
+        end_times = [pd.Timestamp('2023-05-01 12:00'), None, None]
+
+        # execute
+        actual = stops_writer.stop_columns(stops, ['trackId', 'timestamp'], end_times)
+
+        # verify
+        self.assertEqual(pd.Timestamp('2023-05-01 12:00'), actual['timestamp'][0])
+        self.assertTrue(pd.isna(actual['timestamp'][1]))
+
+    def test_timestamp_uses_id_column_not_trajectory_id(self) -> None:
+        # prepare
+        sut = App(moveapps_io=MoveAppsIo())
+        times = pd.date_range('2023-01-01', periods=3, freq='h')
+        traj = mpd.Trajectory(gpd.GeoDataFrame(
+            {'trackId': 'X742', 'geometry': [Point(31.5, -24.5)] * 3}, index=pd.DatetimeIndex(times, name='t'),
+            crs='epsg:4326'
+        ), traj_id=742)
+        data = mpd.TrajectoryCollection([traj])
+        stops = TrackStore.from_collection(data).end_locations([0])
+
+        # execute
+        sut.write_csv(stops, {}, data)
+
+        # verify
+        with open(MoveAppsIo().create_artifacts_file('stationary.csv')) as file:
+            self.assertEqual(times[-1], pd.to_datetime(pd.read_csv(file)['timestamp'])[0])
+
+    def test_unknown_column(self) -> None:
+        with self.assertRaises(ValueError):
+            stops_writer.stop_columns(self.stops, ['trackId', 'speed'])
+
+    def test_empty_stops_write_header_only(self) -> None:
+        # prepare
+        sut = App(moveapps_io=MoveAppsIo())
+
+        # execute
+        with self.assertLogs(level='INFO') as logs:
+            sut.write_csv(gpd.GeoDataFrame(), {"csv_export": 'gzip'})
+
+        # verify
+        self.assertFalse(any('Created csv file' in line for line in logs.output))
+        with open(MoveAppsIo().create_artifacts_file('stationary.csv')) as file:
+            self.assertEqual('trackId,timestamp,lon,lat\n', file.read())
+        self.assertEqual(['stationary.csv', 'stationary.csv.gz'], sut.artifacts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import unittest
+from unittest import mock
+
+import movingpandas as mpd
+import pandas as pd
+from app import sweep, window
+from app.app import App
+from app.stationarity import stationary_track_ids
+from sdk.moveapps_io import MoveAppsIo
+from tests.config.definitions import ROOT_DIR
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self) -> None:
+        os.environ['APP_ARTIFACTS_DIR'] = os.path.join(ROOT_DIR, 'tests/resources/output')
+        self.data: mpd.TrajectoryCollection = pd.read_pickle(
+            os.path.join(ROOT_DIR, 'tests/resources/app/rhino_edited.pickle')
+        )
+
+    def test_sweep_matches_single_runs(self) -> None:
+        # prepare
+        config = {"stop_duration": [48, 1, 10], "distance_tolerance": [10, 100, 10000], "distance_method": 'haversine'}
+
+        # execute
+        actual = sweep.sweep(self.data, config)
+
+        # verify
+        self.assertEqual(9, len(actual))
+        self.assertEqual([1, 10, 48], sorted(set(actual['stop_duration'])))
+        for row in actual.itertuples():
+            single = {"stop_duration": row.stop_duration, "distance_tolerance": row.distance_tolerance,
+                      "distance_method": 'haversine'}
+            expected = [str(track_id) for track_id in stationary_track_ids(self.data, single)]
+            self.assertEqual(expected, row.trackIds.split(';') if row.trackIds else [], f'{single}')
+            self.assertEqual(len(expected), row.count)
+
+    def test_windows_are_computed_once_per_duration(self) -> None:
+        # prepare
+        config = {"stop_duration": [1, 10], "distance_tolerance": [10, 100, 1000, 10000]}
+
+        # execute
+        with mock.patch('app.window.window_bounds', side_effect=window.window_bounds) as window_bounds:
+            sweep.sweep(self.data, config)
+
+        # verify
+        self.assertEqual(2, window_bounds.call_count)
+
+    def test_is_sweep(self) -> None:
+        self.assertFalse(sweep.is_sweep({"stop_duration": 10, "distance_tolerance": 100}))
+        self.assertTrue(sweep.is_sweep({"stop_duration": 10, "distance_tolerance": [100, 200]}))
+        self.assertTrue(sweep.is_sweep({"stop_duration": [10], "distance_tolerance": 100}))
+
+    def test_app_writes_sweep_artifact(self) -> None:
+        # prepare
+        sut = App(moveapps_io=MoveAppsIo())
+        config = {"stop_duration": [10, 20], "distance_tolerance": 100}
+
+        # execute
+        actual = sut.execute(data=self.data, config=config)
+
+        # verify
+        self.assertEqual(self.data, actual)
+        self.assertEqual([sweep.SWEEP_FILE], sut.artifacts)
+        matrix = pd.read_csv(MoveAppsIo().create_artifacts_file(sweep.SWEEP_FILE))
+        self.assertEqual(['stop_duration', 'distance_tolerance', 'count', 'trackIds'], list(matrix.columns))
+        self.assertEqual(2, len(matrix))
+
+
+if __name__ == '__main__':
+    unittest.main()
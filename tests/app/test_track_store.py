@@ -0,0 +1,91 @@
+import os
+import unittest
+
+import movingpandas as mpd
+import numpy as np
+import pandas as pd
+from app.app import App
+from app.track_store import TrackStore
+from geopandas.testing import assert_geodataframe_equal
+from sdk.moveapps_columnar import ColumnarTrajectoryCollection
+from sdk.moveapps_io import MoveAppsIo
+from tests.config.definitions import ROOT_DIR
+
+
+class TestTrackStore(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.data: mpd.TrajectoryCollection = pd.read_pickle(
+            os.path.join(ROOT_DIR, 'tests/resources/app/rhino_edited.pickle')
+        )
+
+    def test_from_collection(self) -> None:
+        # execute
+        store = TrackStore.from_collection(self.data)
+
+        # verify
+        trajectories = list(self.data)
+        self.assertEqual([traj.id for traj in trajectories], store.ids)
+        self.assertEqual(len(trajectories), len(store))
+        for code, traj in enumerate(trajectories):
+            fixes = slice(store.offsets[code], store.offsets[code + 1])
+            expected_t = traj.df.index.values.astype('datetime64[ns]').view(np.int64)
+            np.testing.assert_array_equal(expected_t, store.t[fixes])
+            np.testing.assert_array_equal(traj.df.geometry.x.values, store.x[fixes])
+            np.testing.assert_array_equal(traj.df.geometry.y.values, store.y[fixes])
+        self.assertEqual(store.t.nbytes + store.x.nbytes + store.y.nbytes + store.offsets.nbytes, store.nbytes)
+
+    def test_end_locations_match_filtered_collection(self) -> None:
+        # prepare
+        trajectories = list(self.data)
+        codes = [0, 2]
+        expected = self.data.filter('trackId', [trajectories[code].id for code in codes]).get_end_locations()
+        store = TrackStore.from_collection(self.data)
+
+        # execute
+        actual = store.end_locations(codes)
+
+        # verify
+        assert_geodataframe_equal(expected, actual)
+        self.assertTrue(store.end_locations([]).empty)
+
+    def test_from_points_matches_collection_of_points(self) -> None:
+        # prepare
+        points = self.data.to_point_gdf().rename_axis('timestamp_tz').reset_index()
+        # shuffled, with a duplicated timestamp and a track of a single fix, which the collection drops
+        points = pd.concat([points.sample(frac=1, random_state=0), points.iloc[[5]],
+                            points.iloc[[0]].assign(trackId='single')], ignore_index=True)
+        expected = mpd.TrajectoryCollection(points, 'trackId', t='timestamp_tz')
+        codes = [0, 2]
+
+        # execute
+        actual = TrackStore.from_points(points, 'trackId', 'timestamp_tz')
+
+        # verify
+        reference = TrackStore.from_collection(expected)
+        self.assertEqual(reference.ids, actual.ids)
+        for name in ['t', 'x', 'y', 'offsets']:
+            np.testing.assert_array_equal(getattr(reference, name), getattr(actual, name), name)
+        self.assertEqual(reference.first_values('trackId'), actual.first_values('trackId'))
+        assert_geodataframe_equal(expected.filter('trackId', [actual.ids[code] for code in codes]).get_end_locations(),
+                                  actual.end_locations(codes))
+
+    def test_app_detects_on_columnar_input_without_building_trajectories(self) -> None:
+        # prepare
+        points = self.data.to_point_gdf().rename_axis('timestamp_tz').reset_index()
+        data = ColumnarTrajectoryCollection(points, 'trackId', 'timestamp_tz')
+        config = {"stop_duration": 1000, "distance_tolerance": 1e7}
+        app = App(moveapps_io=MoveAppsIo())
+        expected = app.end_locations(mpd.TrajectoryCollection(points, 'trackId', t='timestamp_tz'), config)
+
+        # execute
+        actual = app.end_locations(data, config)
+
+        # verify
+        self.assertFalse(data.loaded)
+        self.assertEqual(4, len(actual))
+        assert_geodataframe_equal(expected, actual)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from app import window
+
+
+class TestWindow(unittest.TestCase):
+
+    def test_segmented_searchsorted_matches_numpy(self) -> None:
+        # prepare
+        rng = np.random.default_rng(0)
+        lengths = rng.integers(1, 50, size=30)
+        offsets = np.r_[0, np.cumsum(lengths)]
+        t = np.concatenate([np.sort(rng.integers(0, 100, size=n)) for n in lengths])
+        targets = rng.integers(-10, 110, size=len(lengths))
+
+        for side in ['left', 'right']:
+            # execute
+            actual = window.segmented_searchsorted(t, offsets[:-1], offsets[1:], targets, side=side)
+
+            # verify
+            expected = [begin + np.searchsorted(t[begin:end], target, side=side)
+                        for begin, end, target in zip(offsets[:-1], offsets[1:], targets)]
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_thin_windows(self) -> None:
+        # prepare
+        x = np.arange(20, dtype=np.float64)
+        starts, stops = np.array([0, 12, 15]), np.array([10, 15, 15])
+
+        # execute
+        thinned, _, new_starts, new_stops = window.thin_windows(x, -x, starts, stops, 4)
+
+        # verify
+        windows = [thinned[begin:end].tolist() for begin, end in zip(new_starts, new_stops)]
+        self.assertEqual([[0, 3, 6, 9], [12, 13, 14], []], windows)
+
+    def test_trailing_bounds_inclusive_window(self) -> None:
+        # prepare
+        times = pd.date_range('2023-01-01 01:00', periods=4, freq='h')
+
+        # execute
+        count, bounds = window.trailing_bounds(times, np.array([0., 2., 3., 4.]), np.array([0., 5., 6., 7.]), 2)
+
+        # verify
+        self.assertEqual(3, count)
+        self.assertEqual((2., 5., 4., 7.), bounds)
+
+    def test_trailing_bounds_unsorted_and_tz_aware(self) -> None:
+        # prepare
+        times = pd.DatetimeIndex(['2023-01-01 04:00', '2023-01-01 01:00', '2023-01-01 03:30'])
+        times = times.tz_localize('Europe/Berlin')
+
+        # execute
+        count, bounds = window.trailing_bounds(times, np.array([1., 9., 2.]), np.array([1., 9., 2.]), 1)
+
+        # verify
+        self.assertEqual(2, count)
+        self.assertEqual((1., 1., 2., 2.), bounds)
+
+    def test_is_sorted(self) -> None:
+        self.assertTrue(window.is_sorted(np.array([0, 0, 1, 1]), np.array([1, 2, 0, 5])))
+        self.assertFalse(window.is_sorted(np.array([0, 0, 1, 1]), np.array([2, 1, 0, 5])))
+        self.assertFalse(window.is_sorted(np.array([1, 1, 0, 0]), np.array([1, 2, 0, 5])))
@@ -0,0 +1,29 @@
+import unittest
+
+from app.stationarity import stationary_track_ids
+from benchmarks.synthetic import Scenario, collection, fixes_frame
+
+
+class TestSynthetic(unittest.TestCase):
+
+    def test_seeded(self) -> None:
+        # execute
+        first = fixes_frame(Scenario(tracks=5, fixes=20, seed=3))
+        second = fixes_frame(Scenario(tracks=5, fixes=20, seed=3))
+
+        # verify
+        self.assertTrue(first.equals(second))
+        self.assertEqual(100, len(first))
+
+    def test_only_stationary_tracks_are_detected(self) -> None:
+        for crs in ['EPSG:4326', 'EPSG:32736']:
+            # prepare
+            scenario = Scenario(tracks=20, fixes=60, stationary_fraction=0.5, crs=crs, stationary_hours=24)
+            frame = fixes_frame(scenario)
+            expected = sorted(frame.loc[frame['stationary'], 'trackId'].unique())
+
+            # execute
+            actual = stationary_track_ids(collection(scenario), {"stop_duration": 24, "distance_tolerance": 100})
+
+            # verify
+            self.assertEqual(expected, sorted(actual), crs)
@@ -0,0 +1,257 @@
+import filecmp
+import json
+import os
+import tempfile
+from unittest import TestCase, mock
+
+import pandas as pd
+import pluggy
+from app.app import App
+from sdk.moveapps_execution import Job, MoveAppsExecutor, load_manifest
+from sdk.moveapps_io import MoveAppsIo
+from sdk.moveapps_spec import HOOK_NAMESPACE, MoveAppsSpec, hook_impl
+from tests.config.definitions import ROOT_DIR
+
+
+class Recorder:
+
+    def __init__(self):
+        self.data = None
+
+    @hook_impl
+    def execute(self, data, config):
+        self.data = data
+        return data
+
+
+class ArtifactWriter:
+
+    @hook_impl
+    def execute(self, data, config):
+        if config.get('fail'):
+            raise ValueError('failing job')
+        with open(MoveAppsIo.create_artifacts_file('config.json'), 'w') as file:
+            json.dump(config, file)
+        return data
+
+
+class TestMoveAppsExecutor(TestCase):
+
+    def setUp(self) -> None:
+        self.source = os.path.join(ROOT_DIR, 'tests/resources/app/rhino_edited.pickle')
+        self.tmp = tempfile.mkdtemp()
+        self.recorder = Recorder()
+
+    def executor(self, plugin) -> MoveAppsExecutor:
+        pm = pluggy.PluginManager(HOOK_NAMESPACE)
+        pm.add_hookspecs(MoveAppsSpec)
+        pm.register(plugin)
+        return MoveAppsExecutor(plugin_manager=pm)
+
+    def batch_jobs(self, configs: list) -> list:
+        return [Job(self.source, os.path.join(self.tmp, f'output{i}.pickle'), config,
+                    os.path.join(self.tmp, f'artifacts{i}')) for i, config in enumerate(configs)]
+
+    def run_executor(self, source_file: str, output_file: str, **env) -> None:
+        pm = pluggy.PluginManager(HOOK_NAMESPACE)
+        pm.add_hookspecs(MoveAppsSpec)
+        pm.register(self.recorder)
+        variables = dict(SOURCE_FILE=source_file, OUTPUT_FILE=output_file, CONFIGURATION='{}', **env)
+        with mock.patch.dict(os.environ, variables):
+            os.environ.pop('CONFIGURATION_FILE', None)
+            MoveAppsExecutor(plugin_manager=pm).execute()
+
+    def test_pass_through_copies_unchanged_input(self) -> None:
+        # prepare
+        output = os.path.join(self.tmp, 'output.pickle')
+
+        # execute
+        self.run_executor(self.source, output, OUTPUT_PASS_THROUGH='copy')
+
+        # verify
+        self.assertTrue(filecmp.cmp(self.source, output, shallow=False))
+
+    def test_output_is_serialized_by_default(self) -> None:
+        # prepare
+        output = os.path.join(self.tmp, 'output.pickle')
+
+        # execute
+        with mock.patch('shutil.copyfile') as copyfile:
+            self.run_executor(self.source, output)
+
+        # verify
+        copyfile.assert_not_called()
+        expected = pd.read_pickle(self.source)
+        self.assertEqual([traj.id for traj in expected], [traj.id for traj in pd.read_pickle(output)])
+
+    def test_columnar_round_trip(self) -> None:
+        expected = pd.read_pickle(self.source)
+        for extension in ['parquet', 'arrow']:
+            # prepare
+            columnar = os.path.join(self.tmp, f'output.{extension}')
+            self.run_executor(self.source, columnar)
+
+            # execute
+            self.run_executor(columnar, os.path.join(self.tmp, 'output.pickle'))
+
+            # verify
+            actual = self.recorder.data
+            self.assertEqual([traj.id for traj in expected], [traj.id for traj in actual])
+            for expected_traj, actual_traj in zip(expected, actual):
+                pd.testing.assert_index_equal(expected_traj.df.index, actual_traj.df.index)
+                self.assertTrue(expected_traj.df.geometry.geom_equals(actual_traj.df.geometry).all())
+
+    def test_columnar_load_is_lazy(self) -> None:
+        # prepare
+        columnar = os.path.join(self.tmp, 'input.parquet')
+        self.run_executor(self.source, columnar)
+        output = os.path.join(self.tmp, 'output.parquet')
+
+        # execute
+        with self.assertLogs(level='INFO') as logs:
+            self.run_executor(columnar, output)
+
+        # verify
+        self.assertFalse(self.recorder.data.loaded)
+        summary = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((4, 677), (summary['tracks'], summary['fixes']))
+        self.assertEqual(4, len(self.recorder.data.trajectories))
+        pd.testing.assert_frame_equal(pd.read_parquet(columnar), pd.read_parquet(output))
+
+    def test_columnar_trajectory_ids_come_from_track_id_column(self) -> None:
+        # prepare
+        source = os.path.join(ROOT_DIR, 'tests/resources/app/input2.pickle')
+        columnar = os.path.join(self.tmp, 'output.parquet')
+        self.run_executor(source, columnar)
+
+        # execute
+        self.run_executor(columnar, os.path.join(self.tmp, 'output.pickle'))
+
+        # verify
+        expected = sorted(traj.df['trackId'].iloc[0] for traj in pd.read_pickle(source))
+        self.assertEqual(expected, [traj.id for traj in self.recorder.data])
+
+    def test_columnar_column_projection(self) -> None:
+        # prepare
+        columnar = os.path.join(self.tmp, 'output.parquet')
+        self.run_executor(self.source, columnar)
+
+        # execute
+        self.run_executor(columnar, os.path.join(self.tmp, 'output.pickle'), SOURCE_COLUMNS='sensor')
+
+        # verify
+        self.assertEqual(['sensor', 'trackId', 'geometry'], list(self.recorder.data.trajectories[0].df.columns))
+
+    def test_run_summary_is_bounded(self) -> None:
+        # execute
+        with self.assertLogs(level='INFO') as logs:
+            self.run_executor(self.source, os.path.join(self.tmp, 'output.pickle'))
+
+        # verify
+        summary = json.loads(logs.records[-1].getMessage())
+        self.assertEqual('run_summary', summary['event'])
+        self.assertEqual(4, summary['tracks'])
+        self.assertEqual(677, summary['fixes'])
+        self.assertEqual(os.path.getsize(os.path.join(self.tmp, 'output.pickle')), summary['bytes_written'])
+        self.assertEqual({'load', 'app', 'store'}, set(summary['timings_s']))
+        self.assertNotIn('sample', summary)
+        self.assertFalse(any('Trajectory' in record.getMessage() for record in logs.records))
+
+    def test_run_summary_with_sample(self) -> None:
+        # execute
+        with self.assertLogs(level='INFO') as logs:
+            self.run_executor(self.source, os.path.join(self.tmp, 'output.pickle'), LOG_VERBOSITY='sample')
+
+        # verify
+        summary = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(3, len(summary['sample']))
+
+    def test_hook_call_monitoring(self) -> None:
+        # execute
+        with self.assertLogs(level='INFO') as logs:
+            self.run_executor(self.source, os.path.join(self.tmp, 'output.pickle'), APP_PROFILE='spans')
+
+        # verify
+        messages = [record.getMessage() for record in logs.records]
+        records = [json.loads(message) for message in messages if '"event": "hook"' in message]
+        self.assertEqual(1, len(records))
+        self.assertEqual('execute', records[0]['hook'])
+        self.assertFalse(records[0]['failed'])
+
+    def test_batch_isolates_artifacts_of_jobs(self) -> None:
+        for workers in [1, 2]:
+            # prepare
+            jobs = self.batch_jobs([{'job': 0}, {'fail': True}, {'job': 2}])
+
+            # execute
+            with mock.patch.dict(os.environ, {'CONFIGURATION': '{"job": "env"}', 'OUTPUT_PASS_THROUGH': 'copy'}):
+                results = self.executor(ArtifactWriter()).execute_batch(jobs, workers=workers)
+                self.assertEqual('{"job": "env"}', os.environ['CONFIGURATION'])
+
+            # verify
+            self.assertEqual(['ok', 'failed', 'ok'], [result['status'] for result in results])
+            for i in [0, 2]:
+                with open(os.path.join(self.tmp, f'artifacts{i}', 'config.json')) as file:
+                    self.assertEqual({'job': i}, json.load(file))
+                self.assertTrue(filecmp.cmp(self.source, jobs[i].output_file, shallow=False))
+            self.assertFalse(os.path.exists(os.path.join(self.tmp, 'artifacts1', 'config.json')))
+
+    def test_batch_keeps_app_loaded(self) -> None:
+        # prepare
+        jobs = self.batch_jobs([{}, {}])
+
+        # execute
+        self.executor(self.recorder).execute_batch(jobs, workers=1)
+
+        # verify
+        self.assertEqual(4, len(self.recorder.data.trajectories))
+
+    def test_batch_workers_with_detection_workers(self) -> None:
+        # prepare
+        config = {"stop_duration": 10, "distance_tolerance": 100, "map_renderer": 'leaflet'}
+        jobs = self.batch_jobs([dict(config, workers=2), dict(config, workers=2), config])
+
+        # execute
+        with mock.patch.dict(os.environ, {'BATCH_WORKERS': '2'}):
+            results = self.executor(App(moveapps_io=MoveAppsIo())).execute_batch(jobs)
+
+        # verify
+        self.assertEqual(['ok'] * 3, [result['status'] for result in results])
+        for job in jobs[:2]:
+            self.assertTrue(filecmp.cmp(os.path.join(jobs[2].artifacts_dir, 'stationary.csv'),
+                                        os.path.join(job.artifacts_dir, 'stationary.csv'), shallow=False))
+
+    def test_load_manifest(self) -> None:
+        # prepare
+        path = os.path.join(self.tmp, 'manifest.jsonl')
+        with open(path, 'w') as file:
+            file.write(json.dumps({'source': 'a.pickle', 'output': 'out/a.pickle', 'config': {'x': 1}}) + '\n')
+            file.write(json.dumps({'source': 'b.pickle', 'output': 'b.pickle', 'artifacts_dir': 'b'}) + '\n')
+
+        # execute
+        jobs = load_manifest(path, 'artifacts')
+
+        # verify
+        self.assertEqual(Job('a.pickle', 'out/a.pickle', {'x': 1}, os.path.join('artifacts', 'a')), jobs[0])
+        self.assertEqual(Job('b.pickle', 'b.pickle', {}, 'b'), jobs[1])
+
+    def test_spool_directory(self) -> None:
+        # prepare
+        spool = os.path.join(self.tmp, 'spool')
+        os.makedirs(spool)
+        for name, config in [('first', {'job': 1}), ('second', {'fail': True})]:
+            with open(os.path.join(spool, f'{name}.json'), 'w') as file:
+                json.dump({'source': self.source, 'output': os.path.join(self.tmp, f'{name}.pickle'),
+                           'config': config}, file)
+        with open(os.path.join(spool, 'broken.json'), 'w') as file:
+            file.write('{')
+
+        # execute
+        results = self.executor(ArtifactWriter()).watch_spool(spool, poll_interval=0.01, idle_timeout=0)
+
+        # verify
+        self.assertEqual(['ok', 'failed'], [result['status'] for result in results])
+        self.assertEqual(['broken.json.failed', 'first.json.done', 'second.json.failed'],
+                         sorted(name for name in os.listdir(spool) if name.endswith(('.done', '.failed'))))
+        with open(os.path.join(spool, 'artifacts', 'first', 'config.json')) as file:
+            self.assertEqual({'job': 1}, json.load(file))
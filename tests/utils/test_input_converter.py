@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+import movingpandas as mpd
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from tests.config.definitions import ROOT_DIR
+from utils.input_converter import InputConverter
+
+
+def baseline_conversion(csv_path: str) -> mpd.TrajectoryCollection:
+    # the original converter: one whole-file read and a per-row time zone localization
+    data = pd.read_csv(f'{csv_path}/link.csv', parse_dates=['timestamps'])
+    meta = pd.read_csv(f'{csv_path}/meta.csv')
+    data['timestamp_tz'] = data['timestamps'].apply(lambda x: x.tz_localize(meta['tzone'][0]))
+    return mpd.TrajectoryCollection(data, traj_id_col='trackId', crs=meta['crs'][0], t='timestamp_tz',
+                                    x='location.long', y='location.lat')
+
+
+class TestInputConverter(unittest.TestCase):
+
+    def test_matches_baseline_conversion(self) -> None:
+        # prepare
+        csv_path = os.path.join(ROOT_DIR, 'utils/resources/input/input2')
+        expected = baseline_conversion(csv_path)
+        result_file = os.path.join(tempfile.mkdtemp(), 'input2.pickle')
+
+        # execute
+        InputConverter().csv_to_pickle(csv_path, result_file)
+
+        # verify
+        actual = pd.read_pickle(result_file)
+        self.assertEqual([traj.id for traj in expected], [traj.id for traj in actual])
+        for expected_traj, actual_traj in zip(expected, actual):
+            assert_frame_equal(expected_traj.df, actual_traj.df)
+            self.assertEqual(expected_traj.crs, actual_traj.crs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,44 +1,52 @@
+import argparse
+import glob
+import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import movingpandas as mpd
 from tests.config.definitions import ROOT_DIR
 
+DTYPES = {
+    'location.long': 'float64',
+    'location.lat': 'float64',
+}
+
 
 class InputConverter:
 
     def csv_to_pickle(self, csv_path, result_file_name):
-        print(os.getcwd())
-
+        timezone, projection = self.read_meta(file_path=f'{csv_path}/meta.csv')
         pandas = self.read_data_csv(file_path=f'{csv_path}/link.csv')
-        timezone = self.read_timezone(file_path=f'{csv_path}/meta.csv')
-        projection = self.read_projection(file_path=f'{csv_path}/meta.csv')
 
         self.adjust_timestamps(data=pandas, timezone=timezone)
         movingpandas = self.create_moving_pandas(data=pandas, projection=projection)
         self.write_result(file_name=result_file_name, data=movingpandas)
+        return result_file_name
 
     def read_data_csv(self, file_path):
-        csv = pd.read_csv(
-            file_path,
-            parse_dates=['timestamps'],
-        )
-        print(csv.info())
+        """
+        Reads `link.csv` with explicit dtypes for the columns the conversion relies on. Every other column is
+        inferred like a plain `pd.read_csv` (all-empty columns stay float64, other date columns stay strings).
+        """
+        csv = pd.read_csv(file_path, dtype=DTYPES, parse_dates=['timestamps'])
+        logging.info(f'read {len(csv)} rows and {len(csv.columns)} columns from {file_path}')
         return csv
 
+    def read_meta(self, file_path):
+        meta_csv = pd.read_csv(file_path, nrows=1)
+        return meta_csv['tzone'][0], meta_csv['crs'][0]
+
     def read_timezone(self, file_path):
-        meta_csv = pd.read_csv(file_path)
-        tzone = meta_csv['tzone'][0]
-        return tzone
+        return self.read_meta(file_path)[0]
 
     def read_projection(self, file_path):
-        meta_csv = pd.read_csv(file_path)
-        projection = meta_csv['crs'][0]
-        return projection
+        return self.read_meta(file_path)[1]
 
     def adjust_timestamps(self, data, timezone):
-        data['timestamp_tz'] = data['timestamps'].apply(lambda x: x.tz_localize(timezone))
-        print('applied timezone', timezone)
-        print(data.head())
+        data['timestamp_tz'] = data['timestamps'].dt.tz_localize(timezone)
+        logging.info(f'applied timezone {timezone}')
 
     def create_moving_pandas(self, data, projection):
         move = mpd.TrajectoryCollection(
@@ -49,19 +57,38 @@ class InputConverter:
             x='location.long',
             y='location.lat'
         )
-        print(move)
+        logging.info(f'created {move}')
         return move
 
     def write_result(self, file_name, data):
-        print(type(data))
         pd.to_pickle(data, file_name)
 
 
+def convert(csv_path: str, output_dir: str) -> str:
+    return InputConverter().csv_to_pickle(
+        csv_path=csv_path,
+        result_file_name=os.path.join(output_dir, f'{os.path.basename(os.path.normpath(csv_path))}.pickle')
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Converts Movebank exports (directories with link.csv and meta.csv) to pickled '
+                    'TrajectoryCollections named after their directory.'
+    )
+    parser.add_argument('inputs', nargs='*', default=['./resources/input/*'],
+                        help='input directories or glob patterns (default: ./resources/input/*)')
+    parser.add_argument('--output-dir', default=f'{ROOT_DIR}/resources/samples')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of parallel conversions')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    directories = sorted({path for pattern in args.inputs for path in glob.glob(pattern)
+                          if os.path.exists(os.path.join(path, 'link.csv'))})
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(directories) or 1))) as executor:
+        for result in executor.map(convert, directories, [args.output_dir] * len(directories)):
+            logging.info(f'wrote {result}')
+
+
 if __name__ == '__main__':
-    converter = InputConverter()
-    for i in range(1,5):
-        file = f'input{i}'
-        converter.csv_to_pickle(
-            csv_path=f'./resources/input/{file}',
-            result_file_name=f'{ROOT_DIR}/resources/samples/{file}.pickle'
-        )
+    main()